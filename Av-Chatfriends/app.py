@@ -1,25 +1,34 @@
 """
 AI Chat Application using local llama.cpp model via OpenAI-compatible API.
 
-This module provides a Flask web server that serves a ChatGPT-like interface
-for interacting with a local AI model.
+This module provides an async Quart (Flask-compatible ASGI) web server that
+serves a ChatGPT-like interface for interacting with a local AI model. A single
+worker multiplexes many in-flight model requests on its event loop.
 """
 
 import os
-import doctest
-from typing import Optional
-from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+import httpx
+import orjson
+from quart import Quart, Response, request, send_from_directory
+from quart_cors import cors
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 from openai import APIError, APIConnectionError
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__, static_folder='.')
-CORS(app)  # Enable CORS for frontend-backend communication
+logger = logging.getLogger(__name__)
+
+# Initialize Quart app
+app = Quart(__name__, static_folder='.')
+app = cors(app)  # Enable CORS for frontend-backend communication
 
 # Load configuration from environment variables
 BASE_URL = os.getenv("BASE_URL", "http://localhost:12434/engines/llama.cpp/v1")
@@ -28,17 +37,282 @@ API_KEY = os.getenv("API_KEY", "not-needed")
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "500"))
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
 
-# Initialize the OpenAI client with local base URL
+# Stable system prefix sent ahead of every prompt. It must stay byte-identical
+# across requests so llama.cpp can reuse its KV cache for the shared prefix;
+# anything dynamic (retrieved memories, time of day, ...) belongs in a separate
+# message after it, never inside it.
+SYSTEM_PROMPT = os.getenv("SYSTEM_PROMPT", "You are a helpful assistant.")
+
+# Exact-match response cache configuration. Only requests at or below
+# CACHE_MAX_TEMPERATURE are cached: at 0 the model is deterministic, while the
+# default of 0.1 also caches near-deterministic sampling, trading a little
+# response variety for skipping the model round trip on repeated prompts.
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "1024"))
+CACHE_MAX_TEMPERATURE = float(os.getenv("CACHE_MAX_TEMPERATURE", "0.1"))
+
+# Semantic cache configuration (optional, needs sentence-transformers + hnswlib)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "false").lower() == "true"
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+# Production server workers: one per CPU core, capped at 16. Each worker is a
+# separate process with its own caches.
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0")) or min(os.cpu_count() or 1, 16)
+
+# Shared HTTP connection pool so TCP/TLS handshakes are reused across
+# requests; closed after serving (see close_client)
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(60.0, connect=2.0),
+    limits=httpx.Limits(max_keepalive_connections=64, max_connections=128)
+)
+
+# Initialize the async OpenAI client with local base URL
 try:
-    client = OpenAI(base_url=BASE_URL, api_key=API_KEY)
+    client = AsyncOpenAI(base_url=BASE_URL, api_key=API_KEY, http_client=http_client)
 except Exception as e:
-    print(f"Warning: Failed to initialize OpenAI client: {e}")
+    logger.warning("Failed to initialize OpenAI client: %s", e)
     client = None
 
 
-def generate_response(prompt: str, model: Optional[str] = None, 
-                     max_tokens: Optional[int] = None, 
-                     temperature: Optional[float] = None) -> dict:
+def _build_messages(prompt: str) -> list:
+    """
+    Build the chat message list for a prompt.
+
+    The fixed system prompt always comes first and the variable user content
+    last, so consecutive requests share a cacheable prompt prefix.
+
+    Args:
+        prompt (str): The normalized (stripped) prompt.
+
+    Returns:
+        list: Messages in OpenAI chat format.
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class ResponseCache:
+    """
+    Exact-match LRU cache of model responses.
+
+    Keys are normalized (model, max_tokens, temperature, prompt) tuples. Only
+    successful completions are stored.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize (int): Maximum number of cached responses.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: tuple, response: str) -> None:
+        """Store a response, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        """Drop all cached responses and return how many were removed."""
+        cleared = len(self._entries)
+        self._entries.clear()
+        return cleared
+
+
+response_cache = ResponseCache(CACHE_SIZE)
+
+
+class SemanticCache:
+    """
+    Semantic response cache backed by local sentence embeddings.
+
+    Prompts are embedded with a small sentence-transformer and indexed in an
+    HNSW graph (cosine space). A prompt whose similarity to a cached prompt
+    meets the threshold is answered with the cached response, so reworded
+    repeats ("Tell me about X" / "Talk about X") skip the model entirely.
+    Entries expire after `ttl` seconds; when full, the oldest entry is evicted.
+    """
+
+    def __init__(self, model_name: str, threshold: float, max_elements: int, ttl: float):
+        """
+        Initialize the encoder and an empty HNSW index.
+
+        Args:
+            model_name (str): sentence-transformers model used for embeddings.
+            threshold (float): Minimum cosine similarity for a cache hit.
+            max_elements (int): Maximum number of cached prompts.
+            ttl (float): Seconds before a cached response expires.
+        """
+        import hnswlib
+        from sentence_transformers import SentenceTransformer
+
+        self.encoder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self.ttl = ttl
+        self.index = hnswlib.Index(
+            space='cosine',
+            dim=self.encoder.get_sentence_embedding_dimension()
+        )
+        self.index.init_index(max_elements=max_elements, allow_replace_deleted=True)
+        # id -> (created_at, model, max_tokens, response), oldest first
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def embed(self, prompt: str):
+        """Return the normalized embedding for a prompt."""
+        return self.encoder.encode(prompt, normalize_embeddings=True)
+
+    def lookup(self, embedding, model: str, tokens: int) -> Optional[str]:
+        """
+        Find a cached response for a semantically similar prompt.
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss.
+        """
+        with self._lock:
+            self._evict_expired()
+            if not self._entries:
+                return None
+            labels, distances = self.index.knn_query(embedding, k=1)
+            entry = self._entries.get(int(labels[0][0]))
+
+        if entry is None or 1 - distances[0][0] < self.threshold:
+            return None
+        _, entry_model, entry_tokens, response = entry
+        if entry_model != model or entry_tokens != tokens:
+            return None
+        return response
+
+    def store(self, embedding, model: str, tokens: int, response: str) -> None:
+        """Add a prompt embedding and its response to the cache."""
+        if self.max_elements <= 0:
+            return
+        with self._lock:
+            self._evict_expired()
+            if len(self._entries) >= self.max_elements:
+                oldest_id, _ = self._entries.popitem(last=False)
+                self.index.mark_deleted(oldest_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_items([embedding], [entry_id], replace_deleted=True)
+            self._entries[entry_id] = (time.monotonic(), model, tokens, response)
+
+    def clear(self) -> int:
+        """Drop all cached responses and return how many were removed."""
+        with self._lock:
+            cleared = len(self._entries)
+            for entry_id in self._entries:
+                self.index.mark_deleted(entry_id)
+            self._entries.clear()
+            return cleared
+
+    def _evict_expired(self) -> None:
+        """Remove entries older than the TTL (caller holds the lock)."""
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            oldest_id, (created_at, _, _, _) = next(iter(self._entries.items()))
+            if created_at >= cutoff:
+                break
+            del self._entries[oldest_id]
+            self.index.mark_deleted(oldest_id)
+
+
+semantic_cache = None
+if SEMANTIC_CACHE_ENABLED and CACHE_SIZE > 0:
+    try:
+        semantic_cache = SemanticCache(
+            SEMANTIC_MODEL, SEMANTIC_THRESHOLD, CACHE_SIZE, SEMANTIC_CACHE_TTL
+        )
+    except Exception as e:
+        logger.warning("Failed to initialize semantic cache: %s", e)
+
+
+async def _complete(model: str, tokens: int, temp: float, prompt: str) -> str:
+    """
+    Request a single chat completion from the model server.
+
+    Args:
+        model (str): Model name to use.
+        tokens (int): Maximum tokens to generate.
+        temp (float): Temperature for generation.
+        prompt (str): The normalized (stripped) prompt.
+
+    Returns:
+        str: The generated text content.
+    """
+    response = await client.chat.completions.create(
+        model=model,
+        messages=_build_messages(prompt),
+        max_tokens=tokens,
+        temperature=temp
+    )
+    return response.choices[0].message.content
+
+
+async def _semantic_complete(model: str, tokens: int, temp: float, prompt: str) -> str:
+    """
+    Semantic-cache tier in front of _complete.
+
+    Returns a cached response for a similar prompt when one exists, otherwise
+    calls the model and stores the new response. Embedding and the HNSW
+    index operations are CPU-bound, so they run in worker threads to keep
+    the event loop responsive.
+    """
+    embedding = await asyncio.to_thread(semantic_cache.embed, prompt)
+    cached = await asyncio.to_thread(semantic_cache.lookup, embedding, model, tokens)
+    if cached is not None:
+        return cached
+
+    message_content = await _complete(model, tokens, temp, prompt)
+    if message_content:
+        await asyncio.to_thread(semantic_cache.store, embedding, model, tokens, message_content)
+    return message_content
+
+
+async def _cached_complete(model: str, tokens: int, temp: float, prompt: str) -> str:
+    """
+    Exact-match cached variant of _complete.
+
+    Keyed on the normalized (model, tokens, temp, prompt) tuple. Exceptions are
+    never cached, so only successful completions are stored. Exact misses fall
+    through to the semantic cache when it is enabled.
+    """
+    key = (model, tokens, temp, prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if semantic_cache is not None:
+        message_content = await _semantic_complete(model, tokens, temp, prompt)
+    else:
+        message_content = await _complete(model, tokens, temp, prompt)
+
+    if message_content is not None:
+        response_cache.put(key, message_content)
+    return message_content
+
+
+async def generate_response(prompt: str, model: Optional[str] = None,
+                            max_tokens: Optional[int] = None,
+                            temperature: Optional[float] = None) -> dict:
     """
     Generate a response from local llama.cpp model.
     
@@ -57,7 +331,7 @@ def generate_response(prompt: str, model: Optional[str] = None,
         
     Examples:
         >>> # Test with empty prompt (edge case)
-        >>> result = generate_response("")
+        >>> result = asyncio.run(generate_response(""))
         >>> 'success' in result
         True
         >>> result['success']
@@ -66,7 +340,7 @@ def generate_response(prompt: str, model: Optional[str] = None,
         True
         
         >>> # Test with valid prompt structure
-        >>> result = generate_response("test")
+        >>> result = asyncio.run(generate_response("test"))
         >>> 'success' in result
         True
         >>> 'message' in result
@@ -95,19 +369,12 @@ def generate_response(prompt: str, model: Optional[str] = None,
     tokens = max_tokens or MAX_TOKENS
     temp = temperature if temperature is not None else TEMPERATURE
     
+    # Serve (near-)deterministic requests from the exact-match cache
+    complete = _cached_complete if temp <= CACHE_MAX_TEMPERATURE else _complete
+    
     try:
         # Create a chat completion using local model
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "user", "content": prompt.strip()}
-            ],
-            max_tokens=tokens,
-            temperature=temp
-        )
-        
-        # Extract and return the response
-        message_content = response.choices[0].message.content
+        message_content = await complete(model_name, tokens, temp, prompt.strip())
         
         return {
             'success': True,
@@ -135,19 +402,96 @@ def generate_response(prompt: str, model: Optional[str] = None,
         }
 
 
+def _sse(payload: dict) -> bytes:
+    """Format a payload as a server-sent event."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def ojsonify(obj, status: int = 200) -> Response:
+    """
+    Build a JSON response, serialized with orjson.
+
+    orjson writes UTF-8 bytes directly, skipping the stdlib encoder and the
+    separate str-to-bytes step of jsonify.
+
+    Args:
+        obj: The JSON-serializable payload.
+        status (int): HTTP status code. Defaults to 200.
+
+    Returns:
+        Response: The JSON response.
+    """
+    return Response(
+        orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+async def stream_response(prompt: str, model: Optional[str] = None,
+                          max_tokens: Optional[int] = None,
+                          temperature: Optional[float] = None) -> AsyncIterator[bytes]:
+    """
+    Stream a response from local llama.cpp model as server-sent events.
+
+    Tokens are forwarded as the model emits them instead of waiting for the
+    full completion. Streamed requests bypass the response caches.
+
+    Args:
+        prompt (str): The input prompt/question to send to the model.
+        model (Optional[str]): Model name to use (defaults to MODEL_NAME from env).
+        max_tokens (Optional[int]): Maximum tokens to generate (defaults to MAX_TOKENS from env).
+        temperature (Optional[float]): Temperature for generation (defaults to TEMPERATURE from env).
+
+    Yields:
+        bytes: SSE-formatted events, one of:
+            - {"delta": str}: A chunk of generated text.
+            - {"done": true, "model": str}: Generation finished.
+            - {"error": str}: Generation failed; no further events follow.
+    """
+    model_name = model or MODEL_NAME
+    tokens = max_tokens or MAX_TOKENS
+    temp = temperature if temperature is not None else TEMPERATURE
+
+    try:
+        response = await client.chat.completions.create(
+            model=model_name,
+            messages=_build_messages(prompt.strip()),
+            max_tokens=tokens,
+            temperature=temp,
+            stream=True
+        )
+
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield _sse({'delta': delta})
+
+        yield _sse({'done': True, 'model': model_name})
+
+    except APIConnectionError:
+        yield _sse({'error': f'Connection error: Unable to connect to the model server at {BASE_URL}. Please ensure the server is running.'})
+    except APIError as e:
+        yield _sse({'error': f'API error: {str(e)}'})
+    except Exception as e:
+        yield _sse({'error': f'Unexpected error: {str(e)}'})
+
+
 @app.route('/')
-def index():
+async def index():
     """
     Serve the main HTML page.
 
     Returns:
-        Response: Flask response object containing the index.html file.
+        Response: Quart response object containing the index.html file.
     """
-    return send_from_directory('.', 'index.html')
+    return await send_from_directory('.', 'index.html')
 
 
 @app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat():
     """
     API endpoint for chat completion.
     
@@ -155,7 +499,7 @@ def chat():
     model generation function, and returns the result.
 
     Args:
-        None (Uses Flask request context).
+        None (Uses Quart request context).
 
     Expected JSON payload:
         {
@@ -172,25 +516,25 @@ def chat():
             - error (str): Error message if applicable.
         Status Code:
             - 200: Success.
-            - 400: Bad Request (missing prompt).
+            - 400: Bad Request (body is not a JSON object, or missing prompt).
             - 500: Server Error.
     """
     try:
-        data = request.get_json()
+        data = await request.get_json()
         
-        if not data or 'prompt' not in data:
-            return jsonify({
+        if not isinstance(data, dict) or 'prompt' not in data:
+            return ojsonify({
                 'success': False,
                 'message': '',
                 'error': 'Missing required field: prompt'
-            }), 400
+            }, 400)
         
         prompt = data['prompt']
         model = data.get('model')
         max_tokens = data.get('max_tokens')
         temperature = data.get('temperature')
         
-        result = generate_response(
+        result = await generate_response(
             prompt=prompt,
             model=model,
             max_tokens=max_tokens,
@@ -198,18 +542,90 @@ def chat():
         )
         
         status_code = 200 if result['success'] else 500
-        return jsonify(result), status_code
+        return ojsonify(result, status_code)
         
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'message': '',
             'error': f'Server error: {str(e)}'
-        }), 500
+        }, 500)
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+async def chat_stream():
+    """
+    Streaming API endpoint for chat completion.
+
+    Accepts the same JSON payload as /api/chat and responds with a
+    `text/event-stream` of generated tokens (see stream_response).
+
+    Returns:
+        Response: Server-sent event stream, or a JSON error response.
+        Status Code:
+            - 200: Stream started.
+            - 400: Bad Request (body is not a JSON object, or missing or empty prompt).
+            - 500: Server Error (client not initialized).
+    """
+    data = await request.get_json(silent=True)
+
+    if not isinstance(data, dict) or not str(data.get('prompt') or '').strip():
+        return ojsonify({
+            'success': False,
+            'message': '',
+            'error': 'Missing required field: prompt'
+        }, 400)
+
+    if client is None:
+        return ojsonify({
+            'success': False,
+            'message': '',
+            'error': 'OpenAI client not initialized. Please check your configuration.'
+        }, 500)
+
+    events = stream_response(
+        prompt=data['prompt'],
+        model=data.get('model'),
+        max_tokens=data.get('max_tokens'),
+        temperature=data.get('temperature')
+    )
+    return Response(events, mimetype='text/event-stream')
+
+
+@app.route('/api/cache/clear', methods=['POST'])
+async def clear_cache():
+    """
+    Admin endpoint to clear the response caches.
+
+    Args:
+        None.
+
+    Returns:
+        Response: JSON response containing:
+            - success (bool): True once the caches have been cleared.
+            - cleared (int): Number of exact-match responses that were dropped.
+            - semantic_cleared (int): Number of semantic cache entries dropped.
+        Status Code: 200
+    """
+    cleared = response_cache.clear()
+    semantic_cleared = semantic_cache.clear() if semantic_cache is not None else 0
+    return ojsonify({
+        'success': True,
+        'cleared': cleared,
+        'semantic_cleared': semantic_cleared
+    }, 200)
+
+
+@app.after_serving
+async def close_client():
+    """Close the model client and its shared connection pool on shutdown."""
+    if client is not None:
+        await client.close()
+    await http_client.aclose()
 
 
 @app.route('/api/health', methods=['GET'])
-def health():
+async def health():
     """
     Health check endpoint.
 
@@ -226,26 +642,51 @@ def health():
             - client_initialized (bool): Whether the OpenAI client is active.
         Status Code: 200
     """
-    return jsonify({
+    return ojsonify({
         'status': 'healthy',
         'base_url': BASE_URL,
         'model': MODEL_NAME,
         'client_initialized': client is not None
-    }), 200
+    }, 200)
+
+
+def serve(host: str, port: int) -> None:
+    """
+    Run the app under Hypercorn with WEB_WORKERS worker processes.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+
+    Returns:
+        None
+    """
+    from hypercorn.config import Config
+    from hypercorn.run import run
+
+    config = Config()
+    config.application_path = "app:app"
+    config.bind = [f"{host}:{port}"]
+    config.workers = WEB_WORKERS
+    config.worker_class = "asyncio"
+    run(config)
 
 
 if __name__ == "__main__":
-    # Run doctests
-    doctest.testmod(verbose=True)
-    
-    # Get Flask configuration
+    # Get server configuration
     host = os.getenv("FLASK_HOST", "0.0.0.0")
     port = int(os.getenv("FLASK_PORT", "5000"))
-    debug = os.getenv("FLASK_DEBUG", "True").lower() == "true"
-    
-    print(f"Starting Flask server on {host}:{port}")
-    print(f"Base URL: {BASE_URL}")
-    print(f"Model: {MODEL_NAME}")
-    print(f"Client initialized: {client is not None}")
-    
-    app.run(host=host, port=port, debug=debug)
+    debug = os.getenv("FLASK_DEBUG", "False").lower() == "true"
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.info("Starting Quart server on %s:%s", host, port)
+    logger.info("Base URL: %s", BASE_URL)
+    logger.info("Model: %s", MODEL_NAME)
+    logger.info("Client initialized: %s", client is not None)
+
+    if debug:
+        # Single-process development server with reloading and debug pages
+        app.run(host=host, port=port, debug=True)
+    else:
+        logger.info("Workers: %s", WEB_WORKERS)
+        serve(host, port)
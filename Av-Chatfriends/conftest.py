@@ -0,0 +1,45 @@
+"""
+pytest configuration: skip the app.py doctests when no model server is reachable.
+
+The doctests call the configured model server, so offline runs would only
+exercise the connection error path.
+"""
+
+import os
+import socket
+from urllib.parse import urlsplit
+
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def model_server_reachable(timeout: float = 1.0) -> bool:
+    """
+    Check whether anything is listening at BASE_URL's host and port.
+
+    Args:
+        timeout (float): Seconds to wait for the connection. Defaults to 1.0.
+
+    Returns:
+        bool: True if a TCP connection could be opened.
+    """
+    url = urlsplit(os.getenv("BASE_URL", "http://localhost:12434/engines/llama.cpp/v1"))
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        with socket.create_connection((url.hostname or "localhost", port), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+def pytest_collection_modifyitems(config, items):
+    """Mark the doctests as skipped when the model server cannot be reached."""
+    if model_server_reachable():
+        return
+
+    skip = pytest.mark.skip(reason="no model server reachable at BASE_URL")
+    for item in items:
+        if isinstance(item, pytest.DoctestItem):
+            item.add_marker(skip)
@@ -0,0 +1,231 @@
+"""
+Offline tests for the chat app.
+
+A stub stands in for the AsyncOpenAI client, so the caches, the streaming
+endpoint and the cache admin endpoint run without a model server.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+import app
+
+
+class FakeCompletions:
+    """Answers chat completions from a list of replies, recording each call."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if kwargs.get("stream"):
+            return self._stream(reply)
+        message = SimpleNamespace(content=reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, deltas):
+        for delta in deltas:
+            if isinstance(delta, Exception):
+                raise delta
+            choice = SimpleNamespace(delta=SimpleNamespace(content=delta))
+            yield SimpleNamespace(choices=[choice] if delta is not None else [])
+
+
+class FakeSemanticCache:
+    """Semantic cache keyed on the lowercased prompt instead of embeddings."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def embed(self, prompt):
+        return prompt.lower()
+
+    def lookup(self, embedding, model, tokens):
+        return self.entries.get((embedding, model, tokens))
+
+    def store(self, embedding, model, tokens, response):
+        self.entries[(embedding, model, tokens)] = response
+
+    def clear(self):
+        cleared = len(self.entries)
+        self.entries.clear()
+        return cleared
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", app.BASE_URL))
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Install a stub client and empty caches; returns the stub's completions."""
+    fake = FakeCompletions([])
+    monkeypatch.setattr(app, "client", SimpleNamespace(chat=SimpleNamespace(completions=fake)))
+    monkeypatch.setattr(app, "response_cache", app.ResponseCache(8))
+    monkeypatch.setattr(app, "semantic_cache", None)
+    return fake
+
+
+def test_cold_requests_are_cached(completions):
+    completions.replies = ["first", "second"]
+
+    async def run():
+        return [await app.generate_response(prompt, temperature=0) for prompt in ("hi", " hi ")]
+
+    results = asyncio.run(run())
+
+    assert [result["message"] for result in results] == ["first", "first"]
+    assert len(completions.calls) == 1
+    assert completions.calls[0]["messages"] == [
+        {"role": "system", "content": app.SYSTEM_PROMPT},
+        {"role": "user", "content": "hi"},
+    ]
+
+
+def test_hot_requests_bypass_the_cache(completions):
+    completions.replies = ["first", "second"]
+    temperature = app.CACHE_MAX_TEMPERATURE + 0.1
+
+    async def run():
+        return [await app.generate_response("hi", temperature=temperature) for _ in range(2)]
+
+    results = asyncio.run(run())
+
+    assert [result["message"] for result in results] == ["first", "second"]
+    assert len(app.response_cache._entries) == 0
+
+
+def test_failures_are_not_cached(completions):
+    completions.replies = [connection_error(), "recovered"]
+
+    async def run():
+        return [await app.generate_response("hi", temperature=0) for _ in range(2)]
+
+    failed, recovered = asyncio.run(run())
+
+    assert failed["success"] is False
+    assert failed["error"].startswith("Connection error")
+    assert recovered == {"success": True, "message": "recovered", "model": app.MODEL_NAME}
+    assert len(completions.calls) == 2
+
+
+def test_cache_key_includes_model_and_tokens(completions):
+    completions.replies = ["a", "b", "c"]
+
+    async def run():
+        return [
+            (await app.generate_response("hi", model=model, max_tokens=tokens, temperature=0))["message"]
+            for model, tokens in (("m1", 10), ("m2", 10), ("m1", 20), ("m1", 10))
+        ]
+
+    assert asyncio.run(run()) == ["a", "b", "c", "a"]
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = app.ResponseCache(2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.clear() == 2
+    assert cache.get("a") is None
+
+
+def test_disabled_response_cache_stores_nothing():
+    cache = app.ResponseCache(0)
+    cache.put("a", "1")
+
+    assert cache.get("a") is None
+
+
+def test_semantic_tier_answers_exact_misses(completions, monkeypatch):
+    completions.replies = ["answer"]
+    monkeypatch.setattr(app, "semantic_cache", FakeSemanticCache())
+
+    async def run():
+        first = await app.generate_response("Hello", temperature=0)
+        second = await app.generate_response("HELLO", temperature=0)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first["message"] == second["message"] == "answer"
+    assert len(completions.calls) == 1
+
+
+def post(path, **kwargs):
+    async def run():
+        response = await app.app.test_client().post(path, **kwargs)
+        return response, await response.get_data()
+
+    return asyncio.run(run())
+
+
+def test_stream_frames_each_delta_as_an_event(completions):
+    completions.replies = [["Hel", None, "", "lo"]]
+
+    response, body = post("/api/chat/stream", json={"prompt": "hi", "model": "m"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert body == (
+        b'data: {"delta":"Hel"}\n\n'
+        b'data: {"delta":"lo"}\n\n'
+        b'data: {"done":true,"model":"m"}\n\n'
+    )
+    assert completions.calls[0]["stream"] is True
+
+
+def test_stream_ends_with_an_error_event(completions):
+    completions.replies = [["partial", connection_error()]]
+
+    _, body = post("/api/chat/stream", json={"prompt": "hi"})
+
+    events = body.split(b"\n\n")
+    assert events[0] == b'data: {"delta":"partial"}'
+    assert events[1].startswith(b'data: {"error":"Connection error')
+    assert events[2:] == [b""]
+
+
+@pytest.mark.parametrize("payload", [["hi"], {"prompt": "  "}, {}])
+def test_stream_rejects_bodies_without_a_prompt(completions, payload):
+    response, _ = post("/api/chat/stream", json=payload)
+
+    assert response.status_code == 400
+    assert completions.calls == []
+
+
+def test_chat_rejects_bodies_that_are_not_objects(completions):
+    response, _ = post("/api/chat", json=["hi"])
+
+    assert response.status_code == 400
+
+
+def test_cache_clear_reports_and_drops_entries(completions, monkeypatch):
+    completions.replies = ["one", "two", "three"]
+    semantic = FakeSemanticCache()
+    monkeypatch.setattr(app, "semantic_cache", semantic)
+
+    async def ask(prompt):
+        return await app.generate_response(prompt, temperature=0)
+
+    asyncio.run(ask("a"))
+    asyncio.run(ask("b"))
+    response, body = post("/api/cache/clear")
+
+    assert response.status_code == 200
+    assert body == b'{"success":true,"cleared":2,"semantic_cleared":2}'
+    assert asyncio.run(ask("a"))["message"] == "three"
@@ -9,14 +9,24 @@ Features: List, Read, Write, Update, Delete operations with comprehensive securi
 """
 
 import asyncio
-import json
+import codecs
+import functools
+import logging
+import mmap
 import os
+import re
 import sys
 import shutil
-from datetime import datetime
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Optional
+from stat import S_IMODE, S_ISDIR, S_ISREG
+from typing import Any, AnyStr, Optional
 
+import orjson
+from charset_normalizer import from_bytes
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -27,143 +37,1633 @@ from mcp.types import (
     EmbeddedResource,
 )
 
+try:
+    import uvloop  # Faster event loop on Linux/macOS; optional
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger("filesystem_mcp_server")
+
 # ====================================================================
 # CONFIGURATION
 # ====================================================================
 
 BASE_DIRECTORY = Path(os.getenv("MCP_BASE_DIR", os.getcwd())).resolve()
+BASE_PREFIX = os.path.join(str(BASE_DIRECTORY), "")  # Base directory with a trailing separator
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_SEARCH_RESULTS = 100
+MMAP_THRESHOLD = 256 * 1024  # Memory-map files at least this large instead of reading them
+READ_CHUNK_SIZE = 64 * 1024  # Buffer size for streamed line scans
+SEARCH_WINDOW_SIZE = 256 * 1024  # Bytes case-folded at a time by case-insensitive searches
+SEQUENTIAL_WRITE_THRESHOLD = 1024 * 1024  # Hint sequential access to the kernel for writes this large
+STREAM_UPDATE_THRESHOLD = 1024 * 1024  # Update files this large chunk by chunk through a temporary file
+UPDATE_CHUNK_SIZE = 1024 * 1024  # Bytes read per step of a streamed update
+HAS_NOWAIT_READ = hasattr(os, "preadv") and hasattr(os, "RWF_NOWAIT")
+LISTING_TTL = float(os.getenv("MCP_LISTING_TTL", "2"))  # Seconds to reuse a directory listing; 0 disables
+STAT_CACHE_TTL = float(os.getenv("MCP_STAT_CACHE_TTL", "5"))  # Seconds to reuse stats taken by a listing; 0 disables
+PATH_CACHE_SIZE = int(os.getenv("MCP_PATH_CACHE_SIZE", "4096"))  # 0 disables the cache
+READ_CACHE_BYTES = int(float(os.getenv("MCP_READ_CACHE_MB", "64")) * 1024 * 1024)  # 0 disables the cache
 ALLOWED_WRITE = os.getenv("MCP_ALLOW_WRITE", "true").lower() == "true"
 ALLOWED_DELETE = os.getenv("MCP_ALLOW_DELETE", "true").lower() == "true"
+SYNC_WRITES = os.getenv("MCP_SYNC_WRITES", "false").lower() == "true"
+PARALLEL_STAT_THRESHOLD = 50  # Stat directory entries on a thread pool above this count
+STAT_WORKERS = 32
+RMTREE_PARALLEL_THRESHOLD = 1000  # Delete trees with more entries than this in parallel
+UNLINK_CHUNK_SIZE = 256  # Files unlinked per thread-pool task
+USE_BATCH_IO = os.getenv("MCP_BATCH_IO", "false").lower() == "true"
+IO_WORKERS = (os.cpu_count() or 1) * 4  # Threads for offloaded blocking file I/O
+IO_BATCH_SIZE = 32  # Maximum operations a batched I/O thread runs per wakeup
+
+# Preferred encodings when detection is ambiguous (common for short Western text)
+LEGACY_ENCODINGS = ("cp1252", "latin_1")
+
+# ====================================================================
+# SECURITY UTILITIES
+# ====================================================================
+
+class PathCache:
+    """
+    LRU cache of sanitized path resolutions.
+
+    Resolving a path walks every component (stat/readlink), so repeat calls
+    for the same input are served from here, together with the path relative
+    to the base directory that responses report. Only paths that passed the
+    traversal check are stored, and entries are invalidated whenever this
+    server changes the filesystem at or below them.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Create an empty cache.
+
+        Args:
+            max_size (int): Maximum number of resolutions kept; 0 disables caching.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[Path, str]] = OrderedDict()
+
+    def get(self, input_path: str) -> Optional[tuple[Path, str]]:
+        """
+        Look up a previous resolution.
+
+        Args:
+            input_path (str): The path as given by the client.
+
+        Returns:
+            Optional[tuple[Path, str]]: The resolved path and its relative
+                form, or None on a miss.
+        """
+        resolved = self._entries.get(input_path)
+        if resolved is not None:
+            self._entries.move_to_end(input_path)
+        return resolved
+
+    def put(self, input_path: str, resolved: tuple[Path, str]) -> None:
+        """
+        Store a resolution, evicting the least recently used one when full.
+
+        Args:
+            input_path (str): The path as given by the client.
+            resolved (tuple[Path, str]): The sanitized path and its relative form.
+
+        Returns:
+            None
+        """
+        if self.max_size <= 0:
+            return
+        self._entries[input_path] = resolved
+        self._entries.move_to_end(input_path)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, changed: Path) -> None:
+        """
+        Drop every resolution at or below a path that was modified.
+
+        Args:
+            changed (Path): The resolved path that was created, written or deleted.
+
+        Returns:
+            None
+        """
+        target = str(changed)
+        prefix = os.path.join(target, "")
+        stale = [
+            key for key, (resolved, _) in self._entries.items()
+            if str(resolved) == target or str(resolved).startswith(prefix)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+
+path_cache = PathCache(PATH_CACHE_SIZE)
+
+
+class ReadCache:
+    """
+    LRU cache of decoded file contents, bounded by total file size.
+
+    Entries are keyed by resolved path and only served while the file's
+    modification time and size still match the stat taken for the read, so
+    a file changed outside this server is read again. Changes made through
+    this server drop the entry straight away.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Create an empty cache.
+
+        Args:
+            max_bytes (int): Maximum total size of the cached files; 0 disables caching.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, tuple[os.stat_result, str]] = OrderedDict()
+
+    def get(self, file_path: str, stat: os.stat_result) -> Optional[str]:
+        """
+        Look up a file's content, marking it as recently used.
+
+        Args:
+            file_path (str): The resolved path of the file.
+            stat (os.stat_result): The file's current status.
+
+        Returns:
+            Optional[str]: The decoded content, or None on a miss or if the file changed.
+        """
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return None
+
+        cached_stat, content = entry
+        if cached_stat.st_mtime_ns != stat.st_mtime_ns or cached_stat.st_size != stat.st_size:
+            self._drop(file_path)
+            return None
+
+        self._entries.move_to_end(file_path)
+        return content
+
+    def put(self, file_path: str, stat: os.stat_result, content: str) -> None:
+        """
+        Store a file's content, evicting least recently used files to stay within budget.
+
+        Args:
+            file_path (str): The resolved path of the file.
+            stat (os.stat_result): The status of the file the content was read from.
+            content (str): The decoded content.
+
+        Returns:
+            None
+        """
+        if stat.st_size > self.max_bytes:
+            return
+
+        self._drop(file_path)
+        self._entries[file_path] = (stat, content)
+        self.total_bytes += stat.st_size
+        while self.total_bytes > self.max_bytes:
+            _, (evicted_stat, _) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_stat.st_size
+
+    def invalidate(self, changed: Path) -> None:
+        """
+        Drop the contents of every file at or below a path that was modified.
+
+        Args:
+            changed (Path): The resolved path that was created, written or deleted.
+
+        Returns:
+            None
+        """
+        target = str(changed)
+        prefix = os.path.join(target, "")
+        for key in [k for k in self._entries if k == target or k.startswith(prefix)]:
+            self._drop(key)
+
+    def _drop(self, file_path: str) -> None:
+        """Remove one entry and release its share of the budget."""
+        entry = self._entries.pop(file_path, None)
+        if entry is not None:
+            self.total_bytes -= entry[0].st_size
+
+
+read_cache = ReadCache(READ_CACHE_BYTES)
+
+# Directory listings by resolved path: (time listed, entries, entry stats by name)
+_LISTING_CACHE: dict[str, tuple[float, list[dict[str, Any]], dict[str, os.stat_result]]] = {}
+
+
+def invalidate_path(changed: Path) -> None:
+    """
+    Forget cached state affected by a change at a path.
+
+    Drops path resolutions and file contents at or below the path, the
+    listings of the path and anything below it (for directory deletes), and
+    the listings of its ancestors, whose entry sizes or modification times
+    may have changed.
+
+    Args:
+        changed (Path): The resolved path that was created, written or deleted.
+
+    Returns:
+        None
+    """
+    path_cache.invalidate(changed)
+    read_cache.invalidate(changed)
+
+    if not _LISTING_CACHE:
+        return
+
+    target = str(changed)
+    prefix = os.path.join(target, "")
+    for key in [k for k in _LISTING_CACHE if k == target or k.startswith(prefix)]:
+        del _LISTING_CACHE[key]
+    for parent in changed.parents:
+        _LISTING_CACHE.pop(str(parent), None)
+        if parent == BASE_DIRECTORY:
+            break
+
+
+def listed_stat(safe_path: Path) -> Optional[os.stat_result]:
+    """
+    Look up a path's stat from a recent listing of its parent directory.
+
+    Entries are dropped along with the listing whenever the server changes
+    the path, so a hit is only stale if the file changed outside the server
+    within STAT_CACHE_TTL.
+
+    Args:
+        safe_path (Path): The resolved path to look up.
+
+    Returns:
+        Optional[os.stat_result]: The stat taken by the listing, or None on a miss.
+    """
+    cached = _LISTING_CACHE.get(str(safe_path.parent))
+    if cached is None or time.monotonic() - cached[0] >= STAT_CACHE_TTL:
+        return None
+    return cached[2].get(safe_path.name)
+
+
+def sanitize_path(input_path: str) -> Path:
+    """
+    Sanitize and resolve path to prevent directory traversal attacks.
+
+    Args:
+        input_path (str): The path to sanitize.
+
+    Returns:
+        Path: The resolved absolute path.
+
+    Raises:
+        ValueError: If the path attempts to traverse outside the base directory.
+    """
+    return resolve_path(input_path)[0]
+
+
+def resolve_path(input_path: str) -> tuple[Path, str]:
+    """
+    Sanitize a path and return it with its form relative to the base directory.
+
+    Args:
+        input_path (str): The path to sanitize.
+
+    Returns:
+        tuple[Path, str]: The resolved absolute path and the relative path
+            string reported in responses.
+
+    Raises:
+        ValueError: If the path attempts to traverse outside the base directory.
+    """
+    cached = path_cache.get(input_path)
+    if cached is not None:
+        return cached
+
+    result = _resolve_uncached(input_path)
+    path_cache.put(input_path, result)
+    return result
+
+
+def _resolve_uncached(input_path: str) -> tuple[Path, str]:
+    """
+    Resolve a path against the filesystem without touching the path cache.
+
+    Safe to run on an I/O thread: callers store the result in path_cache
+    themselves, from the thread that owns it.
+
+    Args:
+        input_path (str): The path to sanitize.
+
+    Returns:
+        tuple[Path, str]: The resolved absolute path and its relative form.
+
+    Raises:
+        ValueError: If the path attempts to traverse outside the base directory.
+    """
+    try:
+        # Normalize and resolve the path
+        requested = Path(input_path).expanduser()
+        if requested.is_absolute():
+            resolved = requested.resolve()
+        else:
+            resolved = (BASE_DIRECTORY / requested).resolve()
+
+        # Ensure resolved path is within BASE_DIRECTORY
+        return (resolved, str(resolved.relative_to(BASE_DIRECTORY)))
+    except (ValueError, RuntimeError) as e:
+        raise ValueError(f"Access denied: Path traversal attempt detected - {e}")
+
+
+async def resolve_path_async(input_path: str) -> tuple[Path, str]:
+    """
+    Resolve a path like resolve_path, walking the filesystem off the event loop.
+
+    Cached resolutions are returned directly; only misses, which stat and
+    readlink every component, are sent to the I/O threads. The result is
+    stored back on the event loop, so the cache is never changed while
+    invalidate_path iterates it.
+
+    Args:
+        input_path (str): The path to sanitize.
+
+    Returns:
+        tuple[Path, str]: The resolved absolute path and the relative path
+            string reported in responses.
+
+    Raises:
+        ValueError: If the path attempts to traverse outside the base directory.
+    """
+    cached = path_cache.get(input_path)
+    if cached is not None:
+        return cached
+
+    result = await run_io(_resolve_uncached, input_path)
+    path_cache.put(input_path, result)
+    return result
+
+
+def stat_file(safe_path: Path, file_path: str) -> os.stat_result:
+    """
+    Stat a path once and check that it is a regular file.
+
+    Args:
+        safe_path (Path): The resolved path to check.
+        file_path (str): The path as given by the caller, used in error messages.
+
+    Returns:
+        os.stat_result: The stat of the file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the path is not a file.
+    """
+    # safe_path is fully resolved, so lstat sees the same inode as stat
+    try:
+        st = os.lstat(safe_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    if not S_ISREG(st.st_mode):
+        raise ValueError(f"Path is not a file: {file_path}")
+
+    return st
+
+
+def stat_directory(safe_path: Path, directory_path: str) -> os.stat_result:
+    """
+    Stat a path once and check that it is a directory.
+
+    Args:
+        safe_path (Path): The resolved path to check.
+        directory_path (str): The path as given by the caller, used in error messages.
+
+    Returns:
+        os.stat_result: The stat of the directory.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist.
+        ValueError: If the path is not a directory.
+    """
+    try:
+        st = os.lstat(safe_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"Directory not found: {directory_path}")
+
+    if not S_ISDIR(st.st_mode):
+        raise ValueError(f"Path is not a directory: {directory_path}")
+
+    return st
+
+
+def validate_file_size(file_path: Path, st: Optional[os.stat_result] = None) -> None:
+    """
+    Check if file size is within acceptable limits.
+
+    Args:
+        file_path (Path): The path to the file to check.
+        st (Optional[os.stat_result]): A stat already taken for the file. Defaults to None.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the file size exceeds MAX_FILE_SIZE.
+    """
+    size = (st or file_path.stat()).st_size
+    if size > MAX_FILE_SIZE:
+        raise ValueError(
+            f"File exceeds maximum size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+
+
+def validate_write_size(content: str) -> bytes:
+    """
+    Validate content size before writing and encode it for the write.
+
+    Args:
+        content (str): The content to check.
+
+    Returns:
+        bytes: The content encoded as UTF-8, ready to be written.
+
+    Raises:
+        ValueError: If the content size exceeds MAX_FILE_SIZE.
+    """
+    # UTF-8 takes at least one byte per character, so overlong content is
+    # rejected without being encoded
+    if len(content) <= MAX_FILE_SIZE:
+        data = content.encode('utf-8')
+        if len(data) <= MAX_FILE_SIZE:
+            return data
+
+    raise ValueError(
+        f"Content exceeds maximum size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+
+def check_write_permission() -> None:
+    """
+    Check if write operations are allowed.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Raises:
+        PermissionError: If write operations are disabled by configuration.
+    """
+    if not ALLOWED_WRITE:
+        raise PermissionError("Write operations are disabled")
+
+
+def check_delete_permission() -> None:
+    """
+    Check if delete operations are allowed.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Raises:
+        PermissionError: If delete operations are disabled by configuration.
+    """
+    if not ALLOWED_DELETE:
+        raise PermissionError("Delete operations are disabled")
+
+
+def detect_encoding(data: bytes) -> str:
+    """
+    Detect the encoding of raw file bytes that are not valid UTF-8.
+
+    Args:
+        data (bytes): The raw file content (any bytes-like buffer, e.g. an mmap).
+
+    Returns:
+        str: The detected codec name, or 'latin_1' if detection fails.
+    """
+    # Detect the encoding in a single pass over the bytes already in memory
+    matches = from_bytes(bytes(data))
+    best = matches.best()
+    if best is None:
+        # Nothing fits, e.g. text with control characters such as form
+        # feeds; latin-1 decodes any bytes, as the old fallback chain did
+        return "latin_1"
+
+    # Western text is often scored as a Central European or Baltic code page
+    # with the same letters at different positions; keep the legacy
+    # cp1252/latin-1 choice whenever it is a plausible match
+    for match in matches:
+        if match.encoding in LEGACY_ENCODINGS:
+            return match.encoding
+    return best.encoding
+
+
+def decode_content(data: bytes) -> str:
+    """
+    Decode raw file bytes, detecting the encoding if they are not UTF-8.
+
+    Args:
+        data (bytes): The raw file content (any bytes-like buffer, e.g. an mmap).
+
+    Returns:
+        str: The decoded content.
+    """
+    # Fast path: most files are UTF-8 (or plain ASCII)
+    try:
+        return str(data, "utf-8")
+    except UnicodeDecodeError:
+        pass
+
+    # Undecodable bytes left after detection are replaced
+    return str(data, detect_encoding(data), errors="replace")
+
+
+def translate_newlines(text: str) -> str:
+    """
+    Translate \\r\\n and \\r line endings to \\n, as text-mode reads do.
+
+    Args:
+        text (str): The decoded content.
+
+    Returns:
+        str: The content with universal newlines.
+    """
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class LineDecoder:
+    """
+    Decode individual lines of one file with a single, file-wide codec.
+
+    A few bytes of a line are too little to detect an encoding from, so the
+    first line that is not UTF-8 triggers detection over the whole file and
+    that codec is used for every line after it.
+    """
+
+    def __init__(self, content: Any):
+        """
+        Bind the decoder to a file's content.
+
+        Args:
+            content (Any): The whole file as bytes or an mmap.
+        """
+        self.content = content
+        self.encoding = None
+
+    def __call__(self, raw: bytes) -> str:
+        """
+        Decode one line.
+
+        Args:
+            raw (bytes): The raw bytes of the line.
+
+        Returns:
+            str: The decoded line.
+        """
+        if self.encoding is None:
+            try:
+                return str(raw, "utf-8")
+            except UnicodeDecodeError:
+                self.encoding = detect_encoding(self.content)
+        return str(raw, self.encoding, errors="replace")
+
+
+# The line boundaries str.splitlines() splits on
+LINE_BREAK = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+# The single-byte boundaries, which are line breaks in UTF-8 and in every
+# legacy fallback; U+0085, U+2028 and U+2029 only exist in decoded text
+BYTE_LINE_BREAKS = (b"\n", b"\r", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e")
+BYTE_LINE_BREAK = re.compile(b"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e]")
+
+
+def count_line_breaks(data: bytes) -> int:
+    """
+    Count the single-byte line breaks in raw bytes, \\r\\n counting once.
+
+    Args:
+        data (bytes): The raw bytes to scan.
+
+    Returns:
+        int: The number of line boundaries.
+    """
+    count = data.count(b"\n")
+    # A membership test is a memchr, much cheaper than counting a byte that
+    # most files never contain
+    for line_break in BYTE_LINE_BREAKS[1:]:
+        if line_break in data:
+            count += data.count(line_break)
+    if b"\r" in data:
+        count -= data.count(b"\r\n")
+    return count
+
+
+def last_line_start(data: bytes) -> int:
+    """
+    Find where the last line of raw bytes starts.
+
+    Args:
+        data (bytes): The raw bytes to scan.
+
+    Returns:
+        int: The offset just past the last line break, or 0 if there is none.
+    """
+    # Other breaks only matter after the last \n, which is usually close
+    start = data.rfind(b"\n") + 1
+    return max(start, *(data.rfind(b, start) + 1 for b in BYTE_LINE_BREAKS[1:]))
+
+
+@functools.lru_cache(maxsize=256)
+def get_search_pattern(search_string: AnyStr, case_sensitive: bool) -> "re.Pattern[AnyStr]":
+    """
+    Compile (and memoize) a literal search pattern.
+
+    Args:
+        search_string (AnyStr): The literal text (str) or bytes to match.
+        case_sensitive (bool): Whether matching is case-sensitive.
+
+    Returns:
+        re.Pattern[AnyStr]: The compiled pattern.
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(re.escape(search_string), flags)
+
+
+@functools.lru_cache(maxsize=16384)
+def format_mtime(mtime: int) -> str:
+    """
+    Format a modification time as a local ISO 8601 timestamp.
+
+    Memoized on whole seconds, so files saved together (common in large
+    listings) share one formatting call.
+
+    Args:
+        mtime (int): The modification time in whole seconds since the epoch.
+
+    Returns:
+        str: The timestamp, e.g. '2024-01-31T12:00:00'.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(mtime))
+
+
+def now_iso() -> str:
+    """
+    Return the current local time as an ISO 8601 timestamp.
+
+    Shares format_mtime's per-second cache, so operations completing within
+    the same second reuse one formatted string.
+
+    Args:
+        None
+
+    Returns:
+        str: The timestamp, e.g. '2024-01-31T12:00:00'.
+    """
+    return format_mtime(int(time.time()))
+
+
+def load_file(file_path: Path, *, universal_newlines: bool = False) -> tuple[str, os.stat_result]:
+    """
+    Read a file once and decode it, returning the status from the same fd.
+
+    Small files are read with a single os.read sized from fstat, bypassing
+    the buffered/text I/O layers and their extra seek and ioctl calls; large
+    files are memory-mapped and decoded straight from the page cache.
+
+    Args:
+        file_path (Path): The path to the file to read.
+        universal_newlines (bool): Translate line endings to \\n with
+            translate_newlines. Defaults to False, which keeps them as stored.
+
+    Returns:
+        tuple[str, os.stat_result]: The decoded content and the file's status.
+    """
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0))
+    try:
+        stat = os.fstat(fd)
+        if stat.st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                content = decode_content(mm)
+        else:
+            data = os.read(fd, stat.st_size + 1)
+            if len(data) != stat.st_size or stat.st_size == 0:
+                # Size not reported (procfs) or the file changed mid-read
+                with open(fd, "rb", closefd=False) as f:
+                    data += f.read()
+            content = decode_content(data)
+
+        if universal_newlines:
+            content = translate_newlines(content)
+        return content, stat
+    finally:
+        os.close(fd)
+
+
+def to_json(obj: Any) -> str:
+    """
+    Serialize a result as indented JSON text.
+
+    Args:
+        obj (Any): The JSON-serializable result.
+
+    Returns:
+        str: The JSON text, indented by two spaces.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def read_file_with_fallback(file_path: Path) -> str:
+    """
+    Read file once and decode it with encoding detection.
+
+    Args:
+        file_path (Path): The path to the file to read.
+
+    Returns:
+        str: The content of the file.
+    """
+    return load_file(file_path)[0]
+
+
+def search_text(content: str, pattern: "re.Pattern[str]") -> list[dict[str, Any]]:
+    """
+    Find the lines of decoded text that contain a pattern.
+
+    Scans the whole text in one finditer pass and only slices out the lines
+    that match, instead of splitting the content into a list of lines. Lines
+    end at the same boundaries as str.splitlines().
+
+    Args:
+        content (str): The decoded file content.
+        pattern (re.Pattern[str]): Compiled pattern from get_search_pattern.
+
+    Returns:
+        list[dict[str, Any]]: The matches, each with 'lineNumber' and 'line'.
+    """
+    matches = []
+    breaks = LINE_BREAK.finditer(content)
+    next_break = next(breaks, None)
+    line_num = 1
+    line_start = 0
+    reported = 0
+
+    for match in pattern.finditer(content):
+        if LINE_BREAK.search(match.group()):
+            # The match spans lines
+            continue
+
+        # Walk the line breaks up to the line containing the match
+        start = match.start()
+        while next_break is not None and next_break.start() < start:
+            line_num += 1
+            line_start = next_break.end()
+            next_break = next(breaks, None)
+
+        if line_num == reported:
+            continue
+        reported = line_num
+
+        line_end = next_break.start() if next_break is not None else len(content)
+        matches.append({
+            "lineNumber": line_num,
+            "line": content[line_start:line_end].strip(),
+        })
+
+        if len(matches) >= MAX_SEARCH_RESULTS:
+            break
+
+    return matches
+
+
+def try_nowait_read(file_path: Path) -> Optional[tuple[bytes, os.stat_result]]:
+    """
+    Read a small file only if it is entirely in the page cache.
+
+    Uses preadv2 with RWF_NOWAIT (Linux), which returns cached data
+    immediately and fails with EAGAIN rather than waiting on the disk, so
+    hot files can be read on the event loop without a thread hop.
+
+    Args:
+        file_path (Path): The path to the file to read.
+
+    Returns:
+        Optional[tuple[bytes, os.stat_result]]: The content and the file's
+            status, or None if the read would block or is not supported.
+    """
+    if not HAS_NOWAIT_READ:
+        return None
+
+    fd = os.open(file_path, os.O_RDONLY | os.O_CLOEXEC | getattr(os, "O_BINARY", 0))
+    try:
+        stat = os.fstat(fd)
+        if stat.st_size == 0 or stat.st_size >= MMAP_THRESHOLD:
+            # procfs/sysfs files report size 0 but have content, so leave
+            # empty files to the normal read path
+            return None
+
+        buffer = bytearray(stat.st_size)
+        try:
+            read = os.preadv(fd, [buffer], 0, os.RWF_NOWAIT)
+        except OSError:
+            # EAGAIN when not cached, EOPNOTSUPP on filesystems without support
+            return None
+
+        if read != stat.st_size:
+            # Only part of the file is cached
+            return None
+        return bytes(buffer), stat
+    finally:
+        os.close(fd)
+
+
+def find_lines(
+    buffer: Any,
+    needle: bytes,
+    source: Any = None,
+    first_line: int = 1,
+    limit: int = MAX_SEARCH_RESULTS,
+    decode: Optional[LineDecoder] = None
+) -> list[dict[str, Any]]:
+    """
+    Find the lines of a byte buffer that contain a literal.
+
+    Jumps from match to match with the buffer's C-level find, so lines
+    without a match are never split out or inspected individually. Lines
+    end at the single-byte boundaries of str.splitlines() (BYTE_LINE_BREAKS,
+    with \\r\\n as one break).
+
+    Args:
+        buffer (Any): The bytes-like content to search (bytes or an mmap).
+        needle (bytes): The literal to find; must not be empty or contain a
+            line break.
+        source (Any): Content with the same layout to take reported lines
+            from, e.g. the original of a lowercased buffer. Defaults to buffer.
+        first_line (int): Line number of the buffer's first line. Defaults to 1.
+        limit (int): Maximum matches returned. Defaults to MAX_SEARCH_RESULTS.
+        decode (Optional[LineDecoder]): Decoder for the reported lines, shared
+            across calls for the same file. Defaults to one over source.
+
+    Returns:
+        list[dict[str, Any]]: The matches, each with 'lineNumber' and 'line'.
+    """
+    if source is None:
+        source = buffer
+    if decode is None:
+        decode = LineDecoder(source)
+
+    matches = []
+    line_num = first_line
+    counted_to = 0
+    pos = buffer.find(needle)
+
+    while pos != -1:
+        gap = buffer[counted_to:pos]
+        line_num += count_line_breaks(gap)
+        line_start = counted_to + last_line_start(gap)
+
+        line_break = BYTE_LINE_BREAK.search(buffer, pos)
+        line_end = line_break.start() if line_break is not None else len(buffer)
+        counted_to = line_end
+
+        matches.append({
+            "lineNumber": line_num,
+            "line": decode(source[line_start:line_end]).strip(),
+        })
+
+        if len(matches) >= limit:
+            break
+
+        # Continue after this line so it is reported once
+        pos = buffer.find(needle, line_end)
+
+    return matches
+
+
+def search_lines_mapped(
+    file_path: Path,
+    needle: bytes,
+    case_sensitive: bool
+) -> list[dict[str, Any]]:
+    """
+    Scan a file for an ASCII literal through a read-only memory map.
+
+    Lines are matched as bytes, so the file is never decoded or split into a
+    list of strings; only matching lines are decoded, all with one codec
+    detected for the whole file. Lines end at BYTE_LINE_BREAKS, so
+    U+0085, U+2028 and U+2029 in UTF-8 files stay inside their line.
+
+    Args:
+        file_path (Path): The path to the file to search.
+        needle (bytes): The ASCII literal to find.
+        case_sensitive (bool): Whether matching is case-sensitive.
+
+    Returns:
+        list[dict[str, Any]]: The matches, each with 'lineNumber' and 'line'.
+    """
+    matches = []
+
+    with file_path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return matches
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if case_sensitive:
+                return find_lines(mm, needle)
+
+            # Fold case a window of whole lines at a time, so the search stays
+            # a C-level find over large blocks; bytes.lower() only folds
+            # ASCII, which is all the needle contains
+            needle = needle.lower()
+            decode = LineDecoder(mm)
+            start = 0
+            line_num = 1
+
+            while start < size and len(matches) < MAX_SEARCH_RESULTS:
+                end = size
+                if start + SEARCH_WINDOW_SIZE < size:
+                    line_break = BYTE_LINE_BREAK.search(mm, start + SEARCH_WINDOW_SIZE)
+                    if line_break is not None:
+                        end = line_break.end()
+
+                original = mm[start:end]
+                lowered = original.lower()
+                matches.extend(find_lines(
+                    lowered, needle, original, line_num,
+                    MAX_SEARCH_RESULTS - len(matches), decode,
+                ))
+
+                line_num += count_line_breaks(lowered)
+                start = end
+
+    return matches
+
+
+def search_lines_streamed(
+    file_path: Path,
+    pattern: "re.Pattern[str]"
+) -> list[dict[str, Any]]:
+    """
+    Scan a UTF-8 file for a text pattern one line at a time.
+
+    The file is read and decoded in READ_CHUNK_SIZE chunks and split with
+    str.splitlines(), so memory use stays at one chunk plus one line
+    regardless of the file size, and lines end where the decoded fallback
+    ends them.
+
+    Args:
+        file_path (Path): The path to the file to search.
+        pattern (re.Pattern[str]): Compiled pattern from get_search_pattern.
+
+    Returns:
+        list[dict[str, Any]]: The matches, each with 'lineNumber' and 'line'.
+
+    Raises:
+        UnicodeDecodeError: If the file is not valid UTF-8.
+    """
+    matches = []
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    line_num = 0
+    # Decoded text of the line still being read
+    partial = []
+
+    def scan(lines: list[str]) -> bool:
+        nonlocal line_num
+        for line in lines:
+            line_num += 1
+            if pattern.search(line):
+                matches.append({
+                    "lineNumber": line_num,
+                    "line": line.strip(),
+                })
+
+                if len(matches) >= MAX_SEARCH_RESULTS:
+                    return False
+        return True
+
+    with open(file_path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            text = decoder.decode(chunk)
+            if not LINE_BREAK.search(text):
+                partial.append(text)
+                continue
+
+            # The last line may continue in the next chunk, as may a
+            # trailing \r whose \n has not been read yet
+            lines = ("".join(partial) + text).splitlines(keepends=True)
+            partial = [lines.pop()]
+            if not scan(lines):
+                return matches
+
+        tail = "".join(partial) + decoder.decode(b"", final=True)
+        if tail:
+            scan([tail])
+
+    return matches
+
+
+_stat_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_stat_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared thread pool used for parallel directory stats.
+
+    Args:
+        None
+
+    Returns:
+        ThreadPoolExecutor: The pool, created on first use.
+    """
+    global _stat_executor
+    if _stat_executor is None:
+        _stat_executor = ThreadPoolExecutor(max_workers=STAT_WORKERS, thread_name_prefix="mcp-stat")
+    return _stat_executor
+
+
+def scan_directory(directory: Path) -> list[tuple[os.DirEntry, Any]]:
+    """
+    List a directory and stat its entries.
+
+    Args:
+        directory (Path): The resolved directory to scan.
+
+    Returns:
+        list[tuple[os.DirEntry, Any]]: Each entry with its os.stat_result or OSError.
+    """
+    # scandir yields entries with the file type from the directory read and
+    # caches stat(), so each entry costs at most one stat syscall
+    with os.scandir(directory) as it:
+        entries = list(it)
+
+    if len(entries) > PARALLEL_STAT_THRESHOLD:
+        # Stat calls release the GIL, so on slow or network filesystems the
+        # total wait approaches the slowest single stat instead of the sum
+        return list(get_stat_executor().map(stat_entry, entries))
+    return [stat_entry(entry) for entry in entries]
+
+
+def stat_entry(entry: os.DirEntry) -> tuple[os.DirEntry, Any]:
+    """
+    Stat a directory entry, capturing any error instead of raising it.
+
+    Args:
+        entry (os.DirEntry): The entry from os.scandir.
+
+    Returns:
+        tuple[os.DirEntry, Any]: The entry and its os.stat_result, or the OSError raised.
+    """
+    try:
+        return entry, entry.stat()
+    except OSError as e:
+        return entry, e
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """
+    Write a whole buffer to a file descriptor, retrying short writes.
+
+    Args:
+        fd (int): The open file descriptor.
+        data (bytes): The encoded content to write.
+
+    Returns:
+        None
+    """
+    if len(data) >= SEQUENTIAL_WRITE_THRESHOLD and hasattr(os, "posix_fadvise"):
+        # A zero length covers the whole file, wherever an append lands
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    # Slicing the memoryview resumes after a short write without copying
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _fast_write(file_path: Path, data: bytes, *, sync: bool = False) -> os.stat_result:
+    """
+    Write bytes to a file with raw os calls, replacing any existing content.
+
+    Args:
+        file_path (Path): The path to the file.
+        data (bytes): The encoded content to write.
+        sync (bool): Flush the data to disk before returning. Defaults to False.
+
+    Returns:
+        os.stat_result: The file's status after the write.
+    """
+    fd = os.open(
+        file_path,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0),
+        0o666,
+    )
+    try:
+        write_all(fd, data)
+        if sync:
+            getattr(os, "fdatasync", os.fsync)(fd)
+        return os.fstat(fd)
+    finally:
+        os.close(fd)
+
+
+def append_bytes(file_path: Path, data: bytes) -> os.stat_result:
+    """
+    Append encoded content to a file.
+
+    Args:
+        file_path (Path): The path to the file.
+        data (bytes): The encoded content to append.
+
+    Returns:
+        os.stat_result: The file's status after the append.
+    """
+    fd = os.open(
+        file_path,
+        os.O_WRONLY | os.O_APPEND | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0),
+    )
+    try:
+        write_all(fd, data)
+        return os.fstat(fd)
+    finally:
+        os.close(fd)
 
-# ====================================================================
-# SECURITY UTILITIES
-# ====================================================================
 
-def sanitize_path(input_path: str) -> Path:
+def replace_chunks(
+    src: int,
+    dst: int,
+    search_string: str,
+    replace_string: str,
+    case_sensitive: bool,
+    max_replacements: Optional[int]
+) -> int:
     """
-    Sanitize and resolve path to prevent directory traversal attacks.
+    Copy UTF-8 text between file descriptors, replacing a literal on the way.
+
+    Text is decoded UPDATE_CHUNK_SIZE bytes at a time. The end of each chunk
+    that could still be the start of a match is held back until the next
+    chunk arrives, so a match straddling two chunks is still found.
 
     Args:
-        input_path (str): The path to sanitize.
+        src (int): The file descriptor to read from.
+        dst (int): The file descriptor to write the updated text to.
+        search_string (str): The non-empty literal to find.
+        replace_string (str): The replacement; a regex template when case-insensitive.
+        case_sensitive (bool): Whether matching is case-sensitive.
+        max_replacements (Optional[int]): Max replacement count; None or 0 for unlimited.
 
     Returns:
-        Path: The resolved absolute path.
+        int: The number of replacements made.
 
     Raises:
-        ValueError: If the path attempts to traverse outside the base directory.
+        UnicodeDecodeError: If the source is not valid UTF-8.
+        ValueError: If the updated content exceeds MAX_FILE_SIZE.
     """
-    try:
-        # Normalize and resolve the path
-        requested = Path(input_path).expanduser()
-        if requested.is_absolute():
-            resolved = requested.resolve()
+    pattern = get_search_pattern(search_string, case_sensitive)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    spans_lines = "\n" in search_string
+    remaining = max_replacements or -1  # Negative means unlimited
+    replacements = 0
+    written = 0
+    carry = ""
+
+    while True:
+        chunk = os.read(src, UPDATE_CHUNK_SIZE)
+        final = not chunk
+        text = carry + decoder.decode(chunk, final=final)
+
+        if final or remaining == 0:
+            cut = len(text)
+        elif not spans_lines:
+            # A match cannot cross a line break, so every complete line can
+            # be replaced in one call
+            cut = text.rfind("\n") + 1
         else:
-            resolved = (BASE_DIRECTORY / requested).resolve()
-
-        # Ensure resolved path is within BASE_DIRECTORY
-        resolved.relative_to(BASE_DIRECTORY)
+            cut = 0
+
+        if remaining == 0:
+            out = text
+        elif cut:
+            head = text[:cut]
+            if case_sensitive:
+                count = head.count(search_string)
+                if remaining > 0:
+                    count = min(count, remaining)
+                out = head.replace(search_string, replace_string, count)
+            else:
+                out, count = pattern.subn(replace_string, head, count=max(remaining, 0))
+            replacements += count
+            remaining -= count
+        else:
+            # No line break to split on: walk the matches. They are exactly
+            # len(search_string) characters, so any that starts before the
+            # limit lies wholly inside this text
+            limit = len(text) - len(search_string) + 1
+            parts = []
+            pos = 0
+            for match in pattern.finditer(text):
+                if match.start() >= limit:
+                    break
+                parts.append(text[pos:match.start()])
+                parts.append(replace_string if case_sensitive else match.expand(replace_string))
+                pos = match.end()
+                replacements += 1
+                remaining -= 1
+                if remaining == 0:
+                    break
+            cut = len(text) if remaining == 0 else max(pos, limit)
+            parts.append(text[pos:cut])
+            out = "".join(parts)
+
+        carry = text[cut:]
+        data = out.encode("utf-8")
+        written += len(data)
+        if written > MAX_FILE_SIZE:
+            raise ValueError(
+                f"Content exceeds maximum size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+            )
+        write_all(dst, data)
 
-        return resolved
-    except (ValueError, RuntimeError) as e:
-        raise ValueError(f"Access denied: Path traversal attempt detected - {e}")
+        if final:
+            return replacements
 
 
-def validate_file_size(file_path: Path) -> None:
+def copy_metadata(src: int, dst: int, source_stat: os.stat_result) -> None:
     """
-    Check if file size is within acceptable limits.
+    Give a replacement file the ownership and extended attributes of the original.
+
+    Extended attributes include POSIX ACLs and security labels on Linux.
 
     Args:
-        file_path (Path): The path to the file to check.
+        src (int): A file descriptor of the original file.
+        dst (int): A file descriptor of the replacement file.
+        source_stat (os.stat_result): The status of the original file.
 
     Returns:
         None
 
     Raises:
-        ValueError: If the file size exceeds MAX_FILE_SIZE.
+        OSError: If the ownership or an attribute cannot be copied.
     """
-    size = file_path.stat().st_size
-    if size > MAX_FILE_SIZE:
-        raise ValueError(
-            f"File exceeds maximum size of {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
+    if hasattr(os, "fchown"):
+        dst_stat = os.fstat(dst)
+        if (dst_stat.st_uid, dst_stat.st_gid) != (source_stat.st_uid, source_stat.st_gid):
+            os.fchown(dst, source_stat.st_uid, source_stat.st_gid)
+
+    if hasattr(os, "listxattr"):
+        try:
+            names = os.listxattr(src)
+        except OSError:
+            # Filesystem without extended attribute support
+            names = []
+        for name in names:
+            os.setxattr(dst, name, os.getxattr(src, name))
 
 
-def validate_write_size(content: str) -> None:
+def stream_replace(
+    file_path: Path,
+    search_string: str,
+    replace_string: str,
+    case_sensitive: bool,
+    max_replacements: Optional[int],
+    *,
+    sync: bool = False
+) -> Optional[tuple[int, os.stat_result]]:
     """
-    Validate content size before writing.
+    Replace a literal in a UTF-8 file without holding the file in memory.
+
+    The updated text is written to a temporary file in the same directory,
+    which then atomically replaces the original, so readers see either the
+    old or the new content and never a partial write. The file is left
+    untouched when nothing matched or anything fails.
+
+    Replacing the file gives it a new inode. Its permissions, owner and
+    extended attributes are copied over; files with other hard links, or
+    whose owner or attributes cannot be copied, are declined so the caller
+    can rewrite them in place instead, trading atomicity for keeping the
+    inode.
 
     Args:
-        content (str): The content to check.
+        file_path (Path): The path to the file.
+        search_string (str): The non-empty literal to find.
+        replace_string (str): The replacement; a regex template when case-insensitive.
+        case_sensitive (bool): Whether matching is case-sensitive.
+        max_replacements (Optional[int]): Max replacement count; None or 0 for unlimited.
+        sync (bool): Flush the new content to disk before replacing the file. Defaults to False.
 
     Returns:
-        None
+        Optional[tuple[int, os.stat_result]]: The number of replacements and
+            the file's status afterwards, or None if the file must be
+            rewritten in place.
 
     Raises:
-        ValueError: If the content size exceeds MAX_FILE_SIZE.
+        UnicodeDecodeError: If the file is not valid UTF-8.
+        ValueError: If the updated content exceeds MAX_FILE_SIZE.
     """
-    size = len(content.encode('utf-8'))
-    if size > MAX_FILE_SIZE:
-        raise ValueError(
-            f"Content exceeds maximum size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+    src = os.open(file_path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0))
+    try:
+        source_stat = os.fstat(src)
+        if source_stat.st_nlink > 1:
+            # A new inode would split the file from its other links
+            return None
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(src, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        dst, temp_path = tempfile.mkstemp(
+            prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent
         )
+        try:
+            copy_metadata(src, dst, source_stat)
+        except OSError:
+            os.close(dst)
+            os.unlink(temp_path)
+            return None
+
+        try:
+            replacements = replace_chunks(
+                src, dst, search_string, replace_string, case_sensitive, max_replacements
+            )
+            if replacements and sync:
+                getattr(os, "fdatasync", os.fsync)(dst)
+            stat = os.fstat(dst)
+        except BaseException:
+            os.close(dst)
+            os.unlink(temp_path)
+            raise
+        os.close(dst)
+    finally:
+        os.close(src)
+
+    if not replacements:
+        os.unlink(temp_path)
+        return 0, source_stat
 
+    try:
+        # mkstemp creates the file owner-only; keep the original's permissions
+        os.chmod(temp_path, S_IMODE(source_stat.st_mode))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return replacements, stat
 
-def check_write_permission() -> None:
+
+def collect_tree(root: Path) -> tuple[list[str], list[str]]:
     """
-    Check if write operations are allowed.
+    Walk a directory tree without following symlinks.
 
     Args:
-        None
+        root (Path): The directory to walk.
 
     Returns:
-        None
+        tuple[list[str], list[str]]: The non-directory paths, and the directory
+            paths in post-order (children before parents, ending with root).
+    """
+    files = []
+    dirs = []
+    stack = [(str(root), False)]
+
+    while stack:
+        path, visited = stack.pop()
+        if visited:
+            dirs.append(path)
+            continue
 
-    Raises:
-        PermissionError: If write operations are disabled by configuration.
+        stack.append((path, True))
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+                else:
+                    files.append(entry.path)
+
+    return files, dirs
+
+
+def unlink_many(paths: list[str]) -> None:
     """
-    if not ALLOWED_WRITE:
-        raise PermissionError("Write operations are disabled")
+    Unlink a group of files.
 
+    Args:
+        paths (list[str]): The files to remove.
 
-def check_delete_permission() -> None:
+    Returns:
+        None
     """
-    Check if delete operations are allowed.
+    for path in paths:
+        os.unlink(path)
+
+
+def remove_dirs(dirs: list[str]) -> None:
+    """
+    Remove directories in the given order; each must already be empty.
 
     Args:
+        dirs (list[str]): Directories in post-order.
+
+    Returns:
         None
+    """
+    for path in dirs:
+        os.rmdir(path)
+
+
+async def parallel_rmtree(root: Path) -> None:
+    """
+    Delete a directory tree, unlinking files across the thread pool.
+
+    Small trees go straight to shutil.rmtree. Larger ones are walked once,
+    their files unlinked in chunks running concurrently (unlinks on SSDs and
+    network filesystems overlap well), and then the emptied directories are
+    removed bottom-up.
+
+    Args:
+        root (Path): The directory to delete.
 
     Returns:
         None
 
     Raises:
-        PermissionError: If delete operations are disabled by configuration.
+        OSError: If an entry cannot be removed.
     """
-    if not ALLOWED_DELETE:
-        raise PermissionError("Delete operations are disabled")
+    files, dirs = await run_io(collect_tree, root)
 
+    if len(files) + len(dirs) <= RMTREE_PARALLEL_THRESHOLD:
+        await run_io(shutil.rmtree, root)
+        return
 
-def read_file_with_fallback(file_path: Path) -> str:
+    await asyncio.gather(*(
+        asyncio.to_thread(unlink_many, files[start:start + UNLINK_CHUNK_SIZE])
+        for start in range(0, len(files), UNLINK_CHUNK_SIZE)
+    ))
+    await run_io(remove_dirs, dirs)
+
+
+def copy_file_data(source: Path, destination: Path) -> int:
     """
-    Read file with encoding fallback (utf-8, latin-1, cp1252).
+    Copy file bytes, keeping the data in the kernel where supported.
+
+    Uses os.copy_file_range (Linux), which avoids user-space buffers and can
+    reflink on filesystems such as btrfs and xfs; falls back to
+    shutil.copyfileobj elsewhere or when the kernel refuses the range copy.
 
     Args:
-        file_path (Path): The path to the file to read.
+        source (Path): The file to copy from.
+        destination (Path): The file to create or truncate.
 
     Returns:
-        str: The content of the file.
+        int: The number of bytes copied.
     """
-    encodings = ["utf-8", "latin-1", "cp1252"]
-
-    for encoding in encodings:
+    in_fd = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        out_fd = os.open(
+            destination,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o666,
+        )
         try:
-            return file_path.read_text(encoding=encoding)
-        except (UnicodeDecodeError, LookupError):
+            remaining = os.fstat(in_fd).st_size
+            copied = 0
+
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while remaining > 0:
+                        sent = os.copy_file_range(in_fd, out_fd, remaining)
+                        if sent == 0:
+                            break
+                        copied += sent
+                        remaining -= sent
+                    return copied
+                except OSError:
+                    # Unsupported across these filesystems; resume in user space
+                    pass
+
+            with open(in_fd, "rb", closefd=False) as src, open(out_fd, "wb", closefd=False) as dst:
+                src.seek(copied)
+                dst.seek(copied)
+                shutil.copyfileobj(src, dst)
+                return dst.tell()
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+
+# ====================================================================
+# BATCHED I/O ENGINE
+# ====================================================================
+
+def _resolve_futures(completions: list[tuple[asyncio.Future, Any, Optional[BaseException]]]) -> None:
+    """Publish a batch of completed operations on the event loop."""
+    for future, result, error in completions:
+        if future.cancelled():
             continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class IOBatchEngine:
+    """
+    Run blocking file operations on the I/O thread pool in batches.
+
+    Operations are queued like entries on a submission ring. Everything
+    submitted during one event-loop tick is handed to the loop's default
+    executor (IO_WORKERS threads, see main) as one submission, split into at
+    most `workers` groups of up to `batch_size` operations. Each thread runs
+    its group back to back and posts all of its results to the event loop
+    in one wakeup, so concurrent tool calls share thread handoffs while
+    still running in parallel.
+    """
+
+    def __init__(self, workers: int = IO_WORKERS, batch_size: int = IO_BATCH_SIZE):
+        """
+        Configure the engine.
+
+        Args:
+            workers (int): Maximum groups a tick's operations are split into.
+            batch_size (int): Maximum operations run per group.
+        """
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self._pending: dict[asyncio.AbstractEventLoop, list] = {}
+
+    async def submit(self, func, *args, **kwargs) -> Any:
+        """
+        Queue a blocking operation and wait for its result.
+
+        Args:
+            func: The blocking callable to run.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Any: The value returned by func.
+
+        Raises:
+            Exception: Whatever func raised.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending.get(loop)
+        if pending is None:
+            # First operation this tick: submit the whole tick's worth at once
+            pending = self._pending[loop] = []
+            loop.call_soon(self._flush, loop)
+        pending.append((future, functools.partial(func, *args, **kwargs)))
+
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Spread the operations queued during this tick over the pool."""
+        ops = self._pending.pop(loop)
+        size = min(self.batch_size, -(-len(ops) // self.workers))
+        for start in range(0, len(ops), size):
+            loop.run_in_executor(None, self._complete, loop, ops[start:start + size])
+
+    def _complete(self, loop: asyncio.AbstractEventLoop, batch: list) -> None:
+        """Run one group and post its results to the submitting loop."""
+        completions = []
+        for future, call in batch:
+            try:
+                completions.append((future, call(), None))
+            except BaseException as e:
+                completions.append((future, None, e))
+
+        try:
+            loop.call_soon_threadsafe(_resolve_futures, completions)
+        except RuntimeError:
+            # The loop was closed while the group was running
+            pass
+
+
+io_engine: Optional[IOBatchEngine] = IOBatchEngine() if USE_BATCH_IO else None
+
+
+async def run_io(func, *args, **kwargs) -> Any:
+    """
+    Run a blocking file operation off the event loop.
+
+    Uses the batch engine when enabled, otherwise the loop's default thread
+    pool, so a slow disk never stalls other in-flight tool calls.
+
+    Args:
+        func: The blocking callable to run.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
 
-    # Final fallback: read as binary and decode with errors='replace'
-    return file_path.read_bytes().decode("utf-8", errors="replace")
+    Returns:
+        Any: The value returned by func.
+    """
+    if io_engine is not None:
+        return await io_engine.submit(func, *args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
 
 
 # ====================================================================
@@ -186,45 +1686,57 @@ async def list_files_in_directory(directory_path: str) -> list[dict[str, Any]]:
         ValueError: If the path is not a directory.
         PermissionError: If permission is denied.
     """
-    safe_path = sanitize_path(directory_path)
-
-    if not safe_path.exists():
-        raise FileNotFoundError(f"Directory not found: {directory_path}")
+    safe_path = (await resolve_path_async(directory_path))[0]
+    await run_io(stat_directory, safe_path, directory_path)
 
-    if not safe_path.is_dir():
-        raise ValueError(f"Path is not a directory: {directory_path}")
+    cache_key = str(safe_path)
+    cached = _LISTING_CACHE.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < LISTING_TTL:
+        return cached[1]
 
     items = []
+    entry_stats = {}
 
     try:
-        for entry in safe_path.iterdir():
-            try:
-                stat = entry.stat()
-                relative_path = entry.relative_to(BASE_DIRECTORY)
-
-                item = {
-                    "name": entry.name,
-                    "path": str(relative_path),
-                    "type": "directory" if entry.is_dir() else "file",
-                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                }
-
-                if entry.is_file():
-                    item["size"] = stat.st_size
-
-                items.append(item)
-            except (PermissionError, OSError) as e:
-                items.append({
-                    "name": entry.name,
-                    "type": "error",
-                    "error": str(e),
-                })
+        stats = await run_io(scan_directory, safe_path)
     except PermissionError as e:
         raise PermissionError(f"Permission denied: {e}")
 
+    # safe_path is resolved and inside BASE_DIRECTORY, so every entry path
+    # starts with BASE_PREFIX and the relative path is a plain slice
+    prefix_length = len(BASE_PREFIX)
+
+    for entry, stat in stats:
+        try:
+            if isinstance(stat, OSError):
+                raise stat
+            entry_stats[entry.name] = stat
+
+            # Classify from the stat already taken rather than asking the entry again
+            item = {
+                "name": entry.name,
+                "path": entry.path[prefix_length:],
+                "type": "directory" if S_ISDIR(stat.st_mode) else "file",
+                "modified": format_mtime(int(stat.st_mtime)),
+            }
+
+            if S_ISREG(stat.st_mode):
+                item["size"] = stat.st_size
+
+            items.append(item)
+        except (PermissionError, OSError) as e:
+            items.append({
+                "name": entry.name,
+                "type": "error",
+                "error": str(e),
+            })
+
     # Sort: directories first, then files, alphabetically
     items.sort(key=lambda x: (x["type"] != "directory", x["name"].lower()))
 
+    if LISTING_TTL > 0 or STAT_CACHE_TTL > 0:
+        _LISTING_CACHE[cache_key] = (time.monotonic(), items, entry_stats)
+
     return items
 
 
@@ -232,6 +1744,8 @@ async def read_file(file_path: str) -> dict[str, Any]:
     """
     Read the complete contents of a file.
 
+    Line endings are returned as \\n, as a text-mode read returns them.
+
     Args:
         file_path (str): The relative path to the file.
 
@@ -242,24 +1756,37 @@ async def read_file(file_path: str) -> dict[str, Any]:
         FileNotFoundError: If the file does not exist.
         ValueError: If the path is not a file or size is too large.
     """
-    safe_path = sanitize_path(file_path)
-
-    if not safe_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-
-    if not safe_path.is_file():
-        raise ValueError(f"Path is not a file: {file_path}")
-
-    validate_file_size(safe_path)
-
-    content = read_file_with_fallback(safe_path)
-    stat = safe_path.stat()
+    safe_path, relative_path = await resolve_path_async(file_path)
+
+    # A file in a just-listed directory was stat'ed by the listing
+    st = listed_stat(safe_path)
+    if st is None or not S_ISREG(st.st_mode):
+        st = await run_io(stat_file, safe_path, file_path)
+    validate_file_size(safe_path, st)
+
+    cache_key = str(safe_path)
+    content = read_cache.get(cache_key, st)
+    if content is not None:
+        stat = st
+    else:
+        # Cache-hot small files are served without leaving the event loop
+        try:
+            hot = try_nowait_read(safe_path)
+            if hot is not None:
+                data, stat = hot
+                content = translate_newlines(decode_content(data))
+            else:
+                content, stat = await run_io(load_file, safe_path, universal_newlines=True)
+        except FileNotFoundError:
+            # Removed outside the server since the listing that cached its stat
+            raise FileNotFoundError(f"File not found: {file_path}")
+        read_cache.put(cache_key, stat, content)
 
     return {
-        "path": str(safe_path.relative_to(BASE_DIRECTORY)),
+        "path": relative_path,
         "content": content,
         "size": stat.st_size,
-        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        "modified": format_mtime(int(stat.st_mtime)),
         "encoding": "utf-8"
     }
 
@@ -284,35 +1811,38 @@ async def search_file(
         FileNotFoundError: If the file does not exist.
         ValueError: If the path is not a file.
     """
-    safe_path = sanitize_path(file_path)
-
-    if not safe_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-
-    if not safe_path.is_file():
-        raise ValueError(f"Path is not a file: {file_path}")
-
-    validate_file_size(safe_path)
-
-    content = read_file_with_fallback(safe_path)
-    lines = content.splitlines()
-
-    matches = []
-    needle = search_string if case_sensitive else search_string.lower()
-
-    for line_num, line in enumerate(lines, start=1):
-        haystack = line if case_sensitive else line.lower()
-        if needle in haystack:
-            matches.append({
-                "lineNumber": line_num,
-                "line": line.strip(),
-            })
-
-            if len(matches) >= MAX_SEARCH_RESULTS:
-                break
+    safe_path, relative_path = await resolve_path_async(file_path)
+
+    st = await run_io(stat_file, safe_path, file_path)
+    validate_file_size(safe_path, st)
+
+    if not search_string:
+        # Every line contains the empty string
+        content = await run_io(read_file_with_fallback, safe_path)
+        matches = [
+            {"lineNumber": line_num, "line": line.strip()}
+            for line_num, line in zip(range(1, MAX_SEARCH_RESULTS + 1), content.splitlines())
+        ]
+    elif LINE_BREAK.search(search_string):
+        # Lines never contain a line break
+        matches = []
+    elif search_string.isascii():
+        # ASCII encodes identically in UTF-8 and the legacy fallbacks, so the
+        # file can be scanned as raw bytes
+        matches = await run_io(
+            search_lines_mapped, safe_path, search_string.encode("ascii"), case_sensitive
+        )
+    else:
+        pattern = get_search_pattern(search_string, case_sensitive)
+        try:
+            matches = await run_io(search_lines_streamed, safe_path, pattern)
+        except UnicodeDecodeError:
+            # Not UTF-8: decode the whole file with encoding detection
+            content = await run_io(read_file_with_fallback, safe_path)
+            matches = search_text(content, pattern)
 
     return {
-        "file": str(safe_path.relative_to(BASE_DIRECTORY)),
+        "file": relative_path,
         "searchString": search_string,
         "caseSensitive": case_sensitive,
         "totalMatches": len(matches),
@@ -347,27 +1877,30 @@ async def write_file(
     """
     check_write_permission()
 
-    safe_path = sanitize_path(file_path)
-    validate_write_size(content)
+    safe_path, relative_path = await resolve_path_async(file_path)
+    data = validate_write_size(content)
+
+    def prepare() -> bool:
+        # Create parent directories if requested
+        if create_dirs:
+            os.makedirs(safe_path.parent, exist_ok=True)
+        elif not safe_path.parent.exists():
+            raise FileNotFoundError(f"Parent directory does not exist: {safe_path.parent}")
 
-    # Create parent directories if requested
-    if create_dirs:
-        safe_path.parent.mkdir(parents=True, exist_ok=True)
-    elif not safe_path.parent.exists():
-        raise FileNotFoundError(f"Parent directory does not exist: {safe_path.parent}")
+        # Check if overwriting existing file
+        return safe_path.exists()
 
-    # Check if overwriting existing file
-    existed = safe_path.exists()
+    existed = await run_io(prepare)
 
     try:
-        safe_path.write_text(content, encoding='utf-8')
-        stat = safe_path.stat()
+        stat = await run_io(_fast_write, safe_path, data, sync=SYNC_WRITES)
+        invalidate_path(safe_path)
 
         return {
-            "path": str(safe_path.relative_to(BASE_DIRECTORY)),
+            "path": relative_path,
             "operation": "overwritten" if existed else "created",
             "size": stat.st_size,
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "modified": format_mtime(int(stat.st_mtime)),
         }
     except Exception as e:
         raise IOError(f"Failed to write file: {e}")
@@ -395,31 +1928,23 @@ async def append_file(
     """
     check_write_permission()
 
-    safe_path = sanitize_path(file_path)
-
-    if not safe_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-
-    if not safe_path.is_file():
-        raise ValueError(f"Path is not a file: {file_path}")
+    safe_path, relative_path = await resolve_path_async(file_path)
 
     # Check combined size
-    current_size = safe_path.stat().st_size
-    new_content_size = len(content.encode('utf-8'))
-    if current_size + new_content_size > MAX_FILE_SIZE:
+    current_size = (await run_io(stat_file, safe_path, file_path)).st_size
+    data = content.encode('utf-8')
+    if current_size + len(data) > MAX_FILE_SIZE:
         raise ValueError(f"Appending would exceed maximum file size")
 
     try:
-        with safe_path.open('a', encoding='utf-8') as f:
-            f.write(content)
-
-        stat = safe_path.stat()
+        stat = await run_io(append_bytes, safe_path, data)
+        invalidate_path(safe_path)
 
         return {
-            "path": str(safe_path.relative_to(BASE_DIRECTORY)),
+            "path": relative_path,
             "operation": "appended",
             "size": stat.st_size,
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "modified": format_mtime(int(stat.st_mtime)),
         }
     except Exception as e:
         raise IOError(f"Failed to append to file: {e}")
@@ -452,51 +1977,128 @@ async def update_file(
     """
     check_write_permission()
 
-    safe_path = sanitize_path(file_path)
+    safe_path, relative_path = await resolve_path_async(file_path)
 
-    if not safe_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
+    st = await run_io(stat_file, safe_path, file_path)
+    validate_file_size(safe_path, st)
 
-    if not safe_path.is_file():
-        raise ValueError(f"Path is not a file: {file_path}")
+    streamed = None
+    if search_string and st.st_size >= STREAM_UPDATE_THRESHOLD:
+        try:
+            streamed = await run_io(
+                stream_replace, safe_path, search_string, replace_string,
+                case_sensitive, max_replacements, sync=SYNC_WRITES
+            )
+        except UnicodeDecodeError:
+            # Not UTF-8: decode the whole file with encoding detection below
+            pass
+        except OSError as e:
+            raise IOError(f"Failed to update file: {e}")
+
+    if streamed is not None:
+        replacements, stat = streamed
+    else:
+        # Small, non-UTF-8 or hard-linked files are rewritten in place
+        content = await run_io(read_file_with_fallback, safe_path)
+
+        # Perform replacement in a single pass over the content
+        if case_sensitive:
+            updated_content = content.replace(search_string, replace_string, max_replacements or -1)
+            length_delta = len(search_string) - len(replace_string)
+            if length_delta:
+                # Each replacement changes the length by the same amount
+                replacements = (len(content) - len(updated_content)) // length_delta
+            else:
+                replacements = content.count(search_string)
+                if max_replacements:
+                    replacements = min(replacements, max_replacements)
+        else:
+            # Case-insensitive replacement; subn returns the count alongside
+            pattern = get_search_pattern(search_string, False)
+            updated_content, replacements = pattern.subn(
+                replace_string, content, count=max_replacements or 0
+            )
 
-    validate_file_size(safe_path)
+        data = validate_write_size(updated_content)
 
-    content = read_file_with_fallback(safe_path)
+        try:
+            # Content was decoded from raw bytes, so keep its line endings as-is
+            stat = await run_io(_fast_write, safe_path, data, sync=SYNC_WRITES)
+        except Exception as e:
+            raise IOError(f"Failed to update file: {e}")
 
-    # Perform replacement
-    if case_sensitive:
-        if max_replacements:
-            updated_content = content.replace(search_string, replace_string, max_replacements)
-        else:
-            updated_content = content.replace(search_string, replace_string)
-        replacements = content.count(search_string)
-    else:
-        # Case-insensitive replacement
-        import re
-        pattern = re.compile(re.escape(search_string), re.IGNORECASE)
-        matches = pattern.findall(content)
-        replacements = len(matches)
-        if max_replacements:
-            updated_content = pattern.sub(replace_string, content, count=max_replacements)
-        else:
-            updated_content = pattern.sub(replace_string, content)
+    invalidate_path(safe_path)
+
+    return {
+        "path": relative_path,
+        "operation": "updated",
+        "replacements": replacements,
+        "size": stat.st_size,
+        "modified": format_mtime(int(stat.st_mtime)),
+    }
+
+
+async def copy_file(
+    source_path: str,
+    destination_path: str,
+    overwrite: bool = False
+) -> dict[str, Any]:
+    """
+    Copy a file to a new location.
+
+    Args:
+        source_path (str): The relative path to the file to copy.
+        destination_path (str): The relative path of the copy.
+        overwrite (bool): Whether to replace an existing destination file. Defaults to False.
+
+    Returns:
+        dict[str, Any]: Metadata about the copy ('source', 'path', 'operation', 'size', 'modified').
+
+    Raises:
+        PermissionError: If write operations are disabled.
+        FileNotFoundError: If the source or the destination's parent directory does not exist.
+        ValueError: If the source is not a file, is too large, or the destination exists.
+        IOError: If copying fails.
+    """
+    check_write_permission()
+
+    source, source_relative = await resolve_path_async(source_path)
+    destination, destination_relative = await resolve_path_async(destination_path)
+
+    def check() -> bool:
+        validate_file_size(source, stat_file(source, source_path))
+
+        if not destination.parent.exists():
+            raise FileNotFoundError(f"Parent directory does not exist: {destination.parent}")
 
-    validate_write_size(updated_content)
+        existed = destination.exists()
+        if existed and not overwrite:
+            raise ValueError(f"Destination already exists: {destination_path}")
+
+        if existed and not destination.is_file():
+            raise ValueError(f"Destination is not a file: {destination_path}")
+
+        if existed and os.path.samefile(source, destination):
+            raise ValueError("Source and destination are the same file")
+
+        return existed
+
+    existed = await run_io(check)
 
     try:
-        safe_path.write_text(updated_content, encoding='utf-8')
-        stat = safe_path.stat()
+        await run_io(copy_file_data, source, destination)
+        invalidate_path(destination)
+        stat = await run_io(destination.stat)
 
         return {
-            "path": str(safe_path.relative_to(BASE_DIRECTORY)),
-            "operation": "updated",
-            "replacements": min(replacements, max_replacements) if max_replacements else replacements,
+            "source": source_relative,
+            "path": destination_relative,
+            "operation": "overwritten" if existed else "created",
             "size": stat.st_size,
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "modified": format_mtime(int(stat.st_mtime)),
         }
     except Exception as e:
-        raise IOError(f"Failed to update file: {e}")
+        raise IOError(f"Failed to copy file: {e}")
 
 
 # ====================================================================
@@ -520,22 +2122,18 @@ async def delete_file(file_path: str) -> dict[str, Any]:
     """
     check_delete_permission()
 
-    safe_path = sanitize_path(file_path)
-
-    if not safe_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
+    safe_path, relative_path = await resolve_path_async(file_path)
 
-    if not safe_path.is_file():
-        raise ValueError(f"Path is not a file: {file_path}")
+    await run_io(stat_file, safe_path, file_path)
 
     try:
-        relative_path = str(safe_path.relative_to(BASE_DIRECTORY))
-        safe_path.unlink()
+        await run_io(os.unlink, safe_path)
+        invalidate_path(safe_path)
 
         return {
             "path": relative_path,
             "operation": "deleted",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
     except Exception as e:
         raise IOError(f"Failed to delete file: {e}")
@@ -563,31 +2161,27 @@ async def delete_directory(
     """
     check_delete_permission()
 
-    safe_path = sanitize_path(directory_path)
+    safe_path, relative_path = await resolve_path_async(directory_path)
 
-    if not safe_path.exists():
-        raise FileNotFoundError(f"Directory not found: {directory_path}")
-
-    if not safe_path.is_dir():
-        raise ValueError(f"Path is not a directory: {directory_path}")
+    await run_io(stat_directory, safe_path, directory_path)
 
     # Prevent deletion of base directory
     if safe_path == BASE_DIRECTORY:
         raise PermissionError("Cannot delete base directory")
 
     try:
-        relative_path = str(safe_path.relative_to(BASE_DIRECTORY))
 
         if recursive:
-            shutil.rmtree(safe_path)
+            await parallel_rmtree(safe_path)
         else:
-            safe_path.rmdir()  # Only works if empty
+            await run_io(safe_path.rmdir)  # Only works if empty
+        invalidate_path(safe_path)
 
         return {
             "path": relative_path,
             "operation": "deleted",
             "recursive": recursive,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
     except OSError as e:
         if "Directory not empty" in str(e):
@@ -620,20 +2214,21 @@ async def create_directory(
     """
     check_write_permission()
 
-    safe_path = sanitize_path(directory_path)
-
-    if safe_path.exists():
-        raise ValueError(f"Path already exists: {directory_path}")
+    safe_path, relative_path = await resolve_path_async(directory_path)
 
     try:
-        safe_path.mkdir(parents=parents, exist_ok=False)
+        # mkdir reports an existing path itself, so no separate exists() check
+        await run_io(safe_path.mkdir, parents=parents, exist_ok=False)
+        invalidate_path(safe_path)
 
         return {
-            "path": str(safe_path.relative_to(BASE_DIRECTORY)),
+            "path": relative_path,
             "operation": "created",
             "type": "directory",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
+    except FileExistsError:
+        raise ValueError(f"Path already exists: {directory_path}")
     except Exception as e:
         raise IOError(f"Failed to create directory: {e}")
 
@@ -649,6 +2244,16 @@ app = Server("filesystem-manager")
 # RESOURCE HANDLERS
 # ====================================================================
 
+CACHED_RESOURCES = [
+    Resource(
+        uri=f"file:///{BASE_DIRECTORY}",
+        name="File System Root",
+        description=f"Full CRUD access to files and directories from: {BASE_DIRECTORY}",
+        mimeType="application/json",
+    )
+]
+
+
 @app.list_resources()
 async def list_resources() -> list[Resource]:
     """
@@ -657,14 +2262,7 @@ async def list_resources() -> list[Resource]:
     Returns:
         list[Resource]: A list of available file system resources.
     """
-    return [
-        Resource(
-            uri=f"file:///{BASE_DIRECTORY}",
-            name="File System Root",
-            description=f"Full CRUD access to files and directories from: {BASE_DIRECTORY}",
-            mimeType="application/json",
-        )
-    ]
+    return CACHED_RESOURCES
 
 
 @app.read_resource()
@@ -687,208 +2285,237 @@ async def read_resource(uri: str) -> str:
     requested_path = uri.replace("file:///", "")
     items = await list_files_in_directory(requested_path or ".")
 
-    return json.dumps(items, indent=2)
+    return to_json(items)
 
 
 # ====================================================================
 # TOOL HANDLERS
 # ====================================================================
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """
-    List available tools.
+READ_TOOLS = (
+    Tool(
+        name="list_directory",
+        description="List all files and directories in a specified path. Returns name, type, size, and modification date for each item.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "Directory path to list (relative to base directory). Use '.' for current directory.",
+                }
+            },
+            "required": ["path"],
+        },
+    ),
+    Tool(
+        name="read_file",
+        description="Read the complete contents of a file. Returns the file content, size, and metadata.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to read (relative to base directory)",
+                }
+            },
+            "required": ["file_path"],
+        },
+    ),
+    Tool(
+        name="search_file",
+        description="Search for a specific string within a file. Returns all matching lines with line numbers.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to search (relative to base directory)",
+                },
+                "search_string": {
+                    "type": "string",
+                    "description": "String to search for within the file",
+                },
+                "case_sensitive": {
+                    "type": "boolean",
+                    "description": "Whether the search should be case-sensitive (default: false)",
+                    "default": False,
+                },
+            },
+            "required": ["file_path", "search_string"],
+        },
+    ),
+)
 
-    Returns:
-        list[Tool]: A list of Tool objects describing available operations.
-    """
-    tools = [
-        Tool(
-            name="list_directory",
-            description="List all files and directories in a specified path. Returns name, type, size, and modification date for each item.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "path": {
-                        "type": "string",
-                        "description": "Directory path to list (relative to base directory). Use '.' for current directory.",
-                    }
+WRITE_TOOLS = (
+    Tool(
+        name="write_file",
+        description="Write content to a file. Creates new file or overwrites existing one. Optionally creates parent directories.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to write (relative to base directory)",
+                },
+                "content": {
+                    "type": "string",
+                    "description": "Content to write to the file",
+                },
+                "create_dirs": {
+                    "type": "boolean",
+                    "description": "Create parent directories if they don't exist (default: false)",
+                    "default": False,
                 },
-                "required": ["path"],
             },
-        ),
-        Tool(
-            name="read_file",
-            description="Read the complete contents of a file. Returns the file content, size, and metadata.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to the file to read (relative to base directory)",
-                    }
+            "required": ["file_path", "content"],
+        },
+    ),
+    Tool(
+        name="append_file",
+        description="Append content to the end of an existing file.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to append to (relative to base directory)",
+                },
+                "content": {
+                    "type": "string",
+                    "description": "Content to append to the file",
                 },
-                "required": ["file_path"],
             },
-        ),
-        Tool(
-            name="search_file",
-            description="Search for a specific string within a file. Returns all matching lines with line numbers.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "Path to the file to search (relative to base directory)",
-                    },
-                    "search_string": {
-                        "type": "string",
-                        "description": "String to search for within the file",
-                    },
-                    "case_sensitive": {
-                        "type": "boolean",
-                        "description": "Whether the search should be case-sensitive (default: false)",
-                        "default": False,
-                    },
+            "required": ["file_path", "content"],
+        },
+    ),
+    Tool(
+        name="update_file",
+        description="Update file by replacing occurrences of a string with another string. Supports case-sensitive and case-insensitive replacement.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to update (relative to base directory)",
+                },
+                "search_string": {
+                    "type": "string",
+                    "description": "String to search for and replace",
+                },
+                "replace_string": {
+                    "type": "string",
+                    "description": "String to replace matches with",
+                },
+                "case_sensitive": {
+                    "type": "boolean",
+                    "description": "Whether the search should be case-sensitive (default: false)",
+                    "default": False,
+                },
+                "max_replacements": {
+                    "type": "integer",
+                    "description": "Maximum number of replacements to make (default: unlimited)",
                 },
-                "required": ["file_path", "search_string"],
             },
-        ),
-    ]
-
-    if ALLOWED_WRITE:
-        tools.extend([
-            Tool(
-                name="write_file",
-                description="Write content to a file. Creates new file or overwrites existing one. Optionally creates parent directories.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "Path to the file to write (relative to base directory)",
-                        },
-                        "content": {
-                            "type": "string",
-                            "description": "Content to write to the file",
-                        },
-                        "create_dirs": {
-                            "type": "boolean",
-                            "description": "Create parent directories if they don't exist (default: false)",
-                            "default": False,
-                        },
-                    },
-                    "required": ["file_path", "content"],
+            "required": ["file_path", "search_string", "replace_string"],
+        },
+    ),
+    Tool(
+        name="copy_file",
+        description="Copy a file to a new location. Refuses to replace an existing file unless overwrite is set.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "source_path": {
+                    "type": "string",
+                    "description": "Path to the file to copy (relative to base directory)",
+                },
+                "destination_path": {
+                    "type": "string",
+                    "description": "Path of the copy (relative to base directory)",
                 },
-            ),
-            Tool(
-                name="append_file",
-                description="Append content to the end of an existing file.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "Path to the file to append to (relative to base directory)",
-                        },
-                        "content": {
-                            "type": "string",
-                            "description": "Content to append to the file",
-                        },
-                    },
-                    "required": ["file_path", "content"],
+                "overwrite": {
+                    "type": "boolean",
+                    "description": "Replace the destination if it already exists (default: false)",
+                    "default": False,
+                },
+            },
+            "required": ["source_path", "destination_path"],
+        },
+    ),
+    Tool(
+        name="create_directory",
+        description="Create a new directory. Optionally creates parent directories.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "directory_path": {
+                    "type": "string",
+                    "description": "Path to the directory to create (relative to base directory)",
                 },
-            ),
-            Tool(
-                name="update_file",
-                description="Update file by replacing occurrences of a string with another string. Supports case-sensitive and case-insensitive replacement.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "Path to the file to update (relative to base directory)",
-                        },
-                        "search_string": {
-                            "type": "string",
-                            "description": "String to search for and replace",
-                        },
-                        "replace_string": {
-                            "type": "string",
-                            "description": "String to replace matches with",
-                        },
-                        "case_sensitive": {
-                            "type": "boolean",
-                            "description": "Whether the search should be case-sensitive (default: false)",
-                            "default": False,
-                        },
-                        "max_replacements": {
-                            "type": "integer",
-                            "description": "Maximum number of replacements to make (default: unlimited)",
-                        },
-                    },
-                    "required": ["file_path", "search_string", "replace_string"],
+                "parents": {
+                    "type": "boolean",
+                    "description": "Create parent directories if they don't exist (default: false)",
+                    "default": False,
                 },
-            ),
-            Tool(
-                name="create_directory",
-                description="Create a new directory. Optionally creates parent directories.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "directory_path": {
-                            "type": "string",
-                            "description": "Path to the directory to create (relative to base directory)",
-                        },
-                        "parents": {
-                            "type": "boolean",
-                            "description": "Create parent directories if they don't exist (default: false)",
-                            "default": False,
-                        },
-                    },
-                    "required": ["directory_path"],
+            },
+            "required": ["directory_path"],
+        },
+    ),
+)
+
+DELETE_TOOLS = (
+    Tool(
+        name="delete_file",
+        description="Delete a file. This operation is irreversible.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to delete (relative to base directory)",
                 },
-            ),
-        ])
-
-    if ALLOWED_DELETE:
-        tools.extend([
-            Tool(
-                name="delete_file",
-                description="Delete a file. This operation is irreversible.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "file_path": {
-                            "type": "string",
-                            "description": "Path to the file to delete (relative to base directory)",
-                        },
-                    },
-                    "required": ["file_path"],
+            },
+            "required": ["file_path"],
+        },
+    ),
+    Tool(
+        name="delete_directory",
+        description="Delete a directory. Optionally deletes recursively including all contents.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "directory_path": {
+                    "type": "string",
+                    "description": "Path to the directory to delete (relative to base directory)",
                 },
-            ),
-            Tool(
-                name="delete_directory",
-                description="Delete a directory. Optionally deletes recursively including all contents.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "directory_path": {
-                            "type": "string",
-                            "description": "Path to the directory to delete (relative to base directory)",
-                        },
-                        "recursive": {
-                            "type": "boolean",
-                            "description": "Delete directory and all its contents recursively (default: false)",
-                            "default": False,
-                        },
-                    },
-                    "required": ["directory_path"],
+                "recursive": {
+                    "type": "boolean",
+                    "description": "Delete directory and all its contents recursively (default: false)",
+                    "default": False,
                 },
-            ),
-        ])
+            },
+            "required": ["directory_path"],
+        },
+    ),
+)
+
+# Built once: the enabled operations are fixed at startup
+CACHED_TOOLS = [
+    *READ_TOOLS,
+    *(WRITE_TOOLS if ALLOWED_WRITE else ()),
+    *(DELETE_TOOLS if ALLOWED_DELETE else ()),
+]
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """
+    List available tools.
 
-    return tools
+    Returns:
+        list[Tool]: A list of Tool objects describing available operations.
+    """
+    return CACHED_TOOLS
 
 
 @app.call_tool()
@@ -910,11 +2537,11 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         # READ OPERATIONS
         if name == "list_directory":
             items = await list_files_in_directory(arguments.get("path", "."))
-            return [TextContent(type="text", text=json.dumps(items, indent=2))]
+            return [TextContent(type="text", text=to_json(items))]
 
         elif name == "read_file":
             result = await read_file(file_path=arguments["file_path"])
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         elif name == "search_file":
             result = await search_file(
@@ -922,7 +2549,7 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                 search_string=arguments["search_string"],
                 case_sensitive=arguments.get("case_sensitive", False),
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         # WRITE OPERATIONS
         elif name == "write_file":
@@ -931,14 +2558,14 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                 content=arguments["content"],
                 create_dirs=arguments.get("create_dirs", False),
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         elif name == "append_file":
             result = await append_file(
                 file_path=arguments["file_path"],
                 content=arguments["content"],
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         elif name == "update_file":
             result = await update_file(
@@ -948,26 +2575,34 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
                 case_sensitive=arguments.get("case_sensitive", False),
                 max_replacements=arguments.get("max_replacements"),
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
+
+        elif name == "copy_file":
+            result = await copy_file(
+                source_path=arguments["source_path"],
+                destination_path=arguments["destination_path"],
+                overwrite=arguments.get("overwrite", False),
+            )
+            return [TextContent(type="text", text=to_json(result))]
 
         elif name == "create_directory":
             result = await create_directory(
                 directory_path=arguments["directory_path"],
                 parents=arguments.get("parents", False),
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         # DELETE OPERATIONS
         elif name == "delete_file":
             result = await delete_file(file_path=arguments["file_path"])
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         elif name == "delete_directory":
             result = await delete_directory(
                 directory_path=arguments["directory_path"],
                 recursive=arguments.get("recursive", False),
             )
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=to_json(result))]
 
         else:
             raise ValueError(f"Unknown tool: {name}")
@@ -992,11 +2627,16 @@ async def main():
     Returns:
         None
     """
+    # Shared pool for offloaded file I/O, sized for I/O-bound work
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="mcp-io")
+    )
+
     async with stdio_server() as (read_stream, write_stream):
-        print(f"MCP File System Manager running", file=sys.stderr)
-        print(f"Base directory: {BASE_DIRECTORY}", file=sys.stderr)
-        print(f"Write operations: {'ENABLED' if ALLOWED_WRITE else 'DISABLED'}", file=sys.stderr)
-        print(f"Delete operations: {'ENABLED' if ALLOWED_DELETE else 'DISABLED'}", file=sys.stderr)
+        logger.info("MCP File System Manager running")
+        logger.info("Base directory: %s", BASE_DIRECTORY)
+        logger.info("Write operations: %s", "ENABLED" if ALLOWED_WRITE else "DISABLED")
+        logger.info("Delete operations: %s", "ENABLED" if ALLOWED_DELETE else "DISABLED")
 
         await app.run(
             read_stream,
@@ -1006,4 +2646,14 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # stdout carries the MCP protocol, so log to stderr
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=os.getenv("MCP_LOG_LEVEL", "INFO").upper(),
+        format="%(message)s",
+    )
+
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
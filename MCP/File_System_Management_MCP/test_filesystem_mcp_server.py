@@ -0,0 +1,248 @@
+"""
+Offline tests for the file system MCP server.
+
+Each test points the server at a temporary base directory with fresh caches,
+so no configuration or running MCP client is needed.
+"""
+
+import asyncio
+import sys
+import threading
+
+import pytest
+
+import filesystem_mcp_server as fs
+
+CP1252_TEXT = "Le café était très bon.\nRien ici\nÉté à Genève, déjà fini.\n"
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """Serve tmp_path as the base directory with empty caches."""
+    base = tmp_path.resolve()
+    monkeypatch.setattr(fs, "BASE_DIRECTORY", base)
+    monkeypatch.setattr(fs, "BASE_PREFIX", str(base / ""))
+    monkeypatch.setattr(fs, "path_cache", fs.PathCache(fs.PATH_CACHE_SIZE))
+    monkeypatch.setattr(fs, "read_cache", fs.ReadCache(fs.READ_CACHE_BYTES))
+    monkeypatch.setattr(fs, "_LISTING_CACHE", {})
+    return base
+
+
+@pytest.mark.parametrize("case_sensitive", [True, False])
+def test_search_cp1252_file(base_dir, case_sensitive):
+    (base_dir / "notes.txt").write_bytes(CP1252_TEXT.encode("cp1252"))
+
+    result = asyncio.run(fs.search_file("notes.txt", "Gen", case_sensitive))
+
+    assert result["matches"] == [
+        {"lineNumber": 3, "line": "Été à Genève, déjà fini."},
+    ]
+
+
+def test_read_undetectable_legacy_file_as_latin1(base_dir):
+    # Control characters make charset-normalizer reject every code page
+    text = "page one\x0cpage two café\x1c"
+    (base_dir / "pages.txt").write_bytes(text.encode("cp1252"))
+
+    assert asyncio.run(fs.read_file("pages.txt"))["content"] == text
+
+
+def test_search_cp1252_lines_share_one_codec(base_dir):
+    # A lone short line is too little to detect cp1252 from
+    path = base_dir / "short.txt"
+    path.write_bytes("été\n".encode("cp1252") + CP1252_TEXT.encode("cp1252"))
+
+    matches = fs.search_lines_mapped(path, b"t", True)
+
+    assert [m["line"] for m in matches] == [
+        "été", "Le café était très bon.", "Été à Genève, déjà fini.",
+    ]
+
+
+def test_search_legacy_file_splits_lines_like_splitlines(base_dir):
+    text = "un\rdeux été\x0ctrois été\r\nquatre"
+    (base_dir / "breaks.txt").write_bytes(text.encode("cp1252"))
+
+    result = asyncio.run(fs.search_file("breaks.txt", "été", True))
+
+    assert result["matches"] == [
+        {"lineNumber": 2, "line": "deux été"},
+        {"lineNumber": 3, "line": "trois été"},
+    ]
+
+
+@pytest.mark.parametrize("case_sensitive", [True, False])
+def test_search_empty_string_returns_each_line(base_dir, case_sensitive):
+    (base_dir / "notes.txt").write_text("one\n\n  three  \n")
+
+    result = asyncio.run(fs.search_file("notes.txt", "", case_sensitive))
+
+    assert result["matches"] == [
+        {"lineNumber": 1, "line": "one"},
+        {"lineNumber": 2, "line": ""},
+        {"lineNumber": 3, "line": "three"},
+    ]
+
+
+BREAKS_TEXT = "foo\x0cbar foo\rbaz foo\r\nqux\x1ccafé foo\n\nfoo"
+
+
+def breaks_expected(needle):
+    return [
+        {"lineNumber": number, "line": line.strip()}
+        for number, line in enumerate(BREAKS_TEXT.splitlines(), start=1)
+        if needle.lower() in line.lower()
+    ]
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "cp1252"])
+@pytest.mark.parametrize("needle", ["foo", "FOO", "café"])
+@pytest.mark.parametrize("mapped_window", [None, 8])
+def test_search_paths_split_lines_like_splitlines(base_dir, monkeypatch, encoding, needle, mapped_window):
+    if mapped_window is not None:
+        monkeypatch.setattr(fs, "SEARCH_WINDOW_SIZE", mapped_window)
+    monkeypatch.setattr(fs, "READ_CHUNK_SIZE", 5)
+    (base_dir / "breaks.txt").write_bytes(BREAKS_TEXT.encode(encoding))
+
+    result = asyncio.run(fs.search_file("breaks.txt", needle, needle != "FOO"))
+
+    assert result["matches"] == breaks_expected(needle)
+
+
+def test_search_string_with_line_break_never_matches(base_dir):
+    (base_dir / "notes.txt").write_text("one\ntwo\n")
+
+    result = asyncio.run(fs.search_file("notes.txt", "one\ntwo", True))
+
+    assert result["matches"] == []
+
+
+def test_search_text_matches_splitlines():
+    content = "alpha\rbeta alpha\x0bgamma alpha alpha\r\ndelta"
+    pattern = fs.get_search_pattern("alpha", True)
+
+    expected = [
+        {"lineNumber": number, "line": line.strip()}
+        for number, line in enumerate(content.splitlines(), start=1)
+        if "alpha" in line
+    ]
+    assert fs.search_text(content, pattern) == expected
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+@pytest.mark.parametrize("case_sensitive", [True, False])
+def test_update_round_trip(base_dir, monkeypatch, streamed, case_sensitive):
+    if streamed:
+        # Stream every update in chunks small enough to split matches
+        monkeypatch.setattr(fs, "STREAM_UPDATE_THRESHOLD", 0)
+        monkeypatch.setattr(fs, "UPDATE_CHUNK_SIZE", 7)
+    original = "Alpha beta\r\nalpha gamma ALPHA\nnaïve alpha\n" * 3
+
+    async def run():
+        await fs.write_file("doc.txt", original)
+        updated = await fs.update_file("doc.txt", "alpha", "omega", case_sensitive)
+        return updated, await fs.read_file("doc.txt")
+
+    updated, read = asyncio.run(run())
+
+    if case_sensitive:
+        expected = original.replace("alpha", "omega")
+    else:
+        expected = fs.get_search_pattern("alpha", False).sub("omega", original)
+    # The file keeps its \r\n endings; reads report them as \n
+    assert (base_dir / "doc.txt").read_bytes() == expected.encode("utf-8")
+    assert read["content"] == expected.replace("\r\n", "\n")
+    assert updated["replacements"] == (6 if case_sensitive else 12)
+    assert updated["size"] == len(expected.encode("utf-8"))
+
+
+@pytest.mark.parametrize("size", [10, fs.MMAP_THRESHOLD])
+def test_read_translates_line_endings(base_dir, size):
+    text = "a\r\nb\rc\n" + "x" * size
+    (base_dir / "crlf.txt").write_bytes(text.encode("utf-8"))
+
+    read = asyncio.run(fs.read_file("crlf.txt"))
+
+    assert read["content"] == "a\nb\nc\n" + "x" * size
+    assert read["size"] == len(text)
+
+
+def test_update_respects_max_replacements(base_dir):
+    async def run():
+        await fs.write_file("doc.txt", "a a a a")
+        updated = await fs.update_file("doc.txt", "a", "b", True, max_replacements=2)
+        return updated, await fs.read_file("doc.txt")
+
+    updated, read = asyncio.run(run())
+
+    assert updated["replacements"] == 2
+    assert read["content"] == "b b a a"
+
+
+def test_writes_invalidate_read_and_listing_caches(base_dir):
+    async def run():
+        await fs.write_file("notes.txt", "old")
+        before = await fs.read_file("notes.txt")
+        listing_before = await fs.list_files_in_directory(".")
+
+        # Same size, so only invalidation can tell the contents apart
+        await fs.write_file("notes.txt", "new")
+        await fs.write_file("other.txt", "x")
+        after = await fs.read_file("notes.txt")
+        listing_after = await fs.list_files_in_directory(".")
+
+        await fs.delete_file("other.txt")
+        listing_deleted = await fs.list_files_in_directory(".")
+        return before, after, listing_before, listing_after, listing_deleted
+
+    before, after, listing_before, listing_after, listing_deleted = asyncio.run(run())
+
+    assert before["content"] == "old"
+    assert after["content"] == "new"
+    assert [item["name"] for item in listing_before] == ["notes.txt"]
+    assert [item["name"] for item in listing_after] == ["notes.txt", "other.txt"]
+    assert [item["name"] for item in listing_deleted] == ["notes.txt"]
+
+
+def test_path_outside_base_directory_is_rejected(base_dir):
+    with pytest.raises(ValueError, match="Access denied"):
+        asyncio.run(fs.read_file("../outside.txt"))
+
+
+def test_path_cache_is_only_changed_on_the_event_loop(base_dir, monkeypatch):
+    threads = set()
+    put = fs.PathCache.put
+
+    def recording_put(self, input_path, resolved):
+        threads.add(threading.get_ident())
+        put(self, input_path, resolved)
+
+    monkeypatch.setattr(fs.PathCache, "put", recording_put)
+
+    async def run():
+        await asyncio.gather(*(fs.resolve_path_async(f"dir/file{i}.txt") for i in range(20)))
+        return threading.get_ident()
+
+    assert threads == {asyncio.run(run())}
+
+
+def test_writes_invalidate_while_paths_resolve(base_dir):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for i in range(5000):
+            fs.path_cache.put(f"seed{i}", (base_dir / f"seed{i}", f"seed{i}"))
+
+        async def run():
+            await fs.write_file("notes.txt", "old")
+            assert (await fs.read_file("notes.txt"))["content"] == "old"
+            resolves = [fs.resolve_path_async(f"dir/file{i}.txt") for i in range(200)]
+            results = await asyncio.gather(fs.write_file("notes.txt", "new"), *resolves)
+            return results[0], await fs.read_file("notes.txt")
+
+        written, read = asyncio.run(run())
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert written["operation"] == "overwritten"
+    assert read["content"] == "new"
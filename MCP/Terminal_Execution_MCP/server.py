@@ -5,17 +5,990 @@ Provides command execution capabilities for CMD, PowerShell, WSL/Ubuntu, and Git
 """
 
 import asyncio
+import base64
+import codecs
+import functools
 import subprocess
 import sys
+import threading
 import os
+import re
+import secrets
+import shlex
 import shutil
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable, Awaitable, TYPE_CHECKING
+import orjson
+
+try:
+    import fcntl  # Pipe buffer sizing on Linux; absent on Windows
+except ImportError:
+    fcntl = None
+
+if TYPE_CHECKING:
+    # mcp is imported when the server is built, see create_app
+    from mcp.server import Server
+
+
+# Shells kept running between calls: comma-separated cmd, powershell, wsl,
+# gitbash, or "all". Empty (the default) starts a fresh process per command.
+POOL_SETTING = os.getenv("MCP_SHELL_POOL", "").strip().lower()
+POOL_SHELLS = (
+    {"cmd", "powershell", "wsl", "gitbash"} if POOL_SETTING == "all"
+    else {name.strip() for name in POOL_SETTING.split(",") if name.strip()}
+)
+POOL_SIZE = int(os.getenv("MCP_SHELL_POOL_SIZE", "2"))  # Warm processes per pooled shell
+# Linux pipe buffer for child stdout/stderr (default 64 KiB): a bigger buffer lets
+# the child write more between event-loop wakeups. 0 keeps the default.
+PIPE_SIZE = int(os.getenv("MCP_PIPE_SIZE", str(1024 * 1024)))
+READ_SIZE = 64 * 1024
+MAX_OUTPUT_BYTES = int(os.getenv("MCP_MAX_OUTPUT_BYTES", str(8 * 1024 * 1024)))  # Kept per stream
+# Skip the logo, profile scripts and execution policy lookup on every start
+POWERSHELL_ARGS = [
+    "powershell.exe", "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass"
+]
+WSL_KEEPALIVE = float(os.getenv("MCP_WSL_KEEPALIVE", "45"))  # Seconds between VM wake-ups; 0 disables
+# Messages wsl.exe prints when there is no usable distribution
+WSL_MISSING_MARKERS = ("no installed distributions", "is not installed")
+# On Windows, spawn with subprocess.Popen on worker threads instead of through
+# the proactor event loop's subprocess transport
+USE_THREAD_SPAWN = sys.platform == "win32"
+SPAWN_WORKERS = int(os.getenv("MCP_SPAWN_WORKERS", "8"))
+# One-shot commands allowed to run at once per shell; more wait for a slot, so a
+# burst of calls does not cold-start dozens of shells that compete for the CPU.
+# Values below 1 count as 1, since a limit of 0 would never run anything
+MAX_CONCURRENT = os.getenv("MCP_MAX_CONCURRENT")
+SPAWN_LIMITS = {
+    kind: max(1, int(MAX_CONCURRENT)) if MAX_CONCURRENT else min(limit, max(2, os.cpu_count() or 1))
+    for kind, limit in {"cmd": 8, "powershell": 4, "wsl": 4, "gitbash": 4}.items()
+}
+# Seconds a timed-out command gets to exit after the polite signal before it is killed
+KILL_GRACE = float(os.getenv("MCP_KILL_GRACE", "2"))
+# Each command gets its own process group, so a timeout stops everything it started
+if sys.platform == "win32":
+    NEW_GROUP: Dict[str, Any] = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    NEW_GROUP = {"start_new_session": True}
+# Windows path translation: backslashes to slashes, then a leading drive letter
+_BACKSLASH_TBL = str.maketrans("\\", "/")
+_DRIVE_RE = re.compile(r"^([A-Za-z]):(?:/|$)")
+# CMD commands without these characters are plain "program args" lines that can
+# skip cmd.exe when the program is an executable rather than a built-in or batch file
+_SHELL_META = re.compile(r"[|&<>^%()\"'`!]")
+DIRECT_EXTENSIONS = (".exe", ".com")
+CMD_BUILTINS = frozenset((
+    "assoc", "break", "call", "cd", "chdir", "cls", "color", "copy", "date", "del",
+    "dir", "echo", "endlocal", "erase", "exit", "for", "ftype", "goto", "if", "md",
+    "mkdir", "mklink", "move", "path", "pause", "popd", "prompt", "pushd", "rd", "rem",
+    "ren", "rename", "rmdir", "set", "setlocal", "shift", "start", "time", "title",
+    "type", "ver", "verify", "vol",
+))
+# Results with more output than this are serialized on a worker thread
+OFFLOAD_JSON_BYTES = 256 * 1024
+SHELL_NAMES = {"cmd": "CMD", "powershell": "PowerShell", "wsl": "WSL/Ubuntu", "gitbash": "Git Bash"}
+NOOP_COMMANDS = {"cmd": "rem", "powershell": "$null", "wsl": ":", "gitbash": ":"}
+
+
+def _truncation_note(omitted: int) -> str:
+    """
+    Describe output dropped for exceeding MAX_OUTPUT_BYTES.
+
+    Args:
+        omitted (int): The number of bytes dropped.
+
+    Returns:
+        str: The note to append to the kept output, or "" if nothing was dropped.
+    """
+    return f"\n[output truncated: {omitted} more bytes]" if omitted else ""
+
+
+def _with_omitted(output: bytes, omitted: int) -> bytes:
+    """
+    Append the truncation note to raw output.
+
+    Args:
+        output (bytes): The output that was kept.
+        omitted (int): The number of bytes dropped after it.
+
+    Returns:
+        bytes: The output, with the note if anything was dropped.
+    """
+    return bytes(output) + _truncation_note(omitted).encode()
+
+
+class OutputBuffer:
+    """
+    Decoded output of one stream, bounded to a byte budget.
+
+    Each chunk is decoded as it arrives, so decoding overlaps with waiting
+    on the pipe rather than walking the whole buffer afterwards. Chunks past
+    the budget are counted and dropped, so the reader keeps draining the
+    pipe and the child never blocks on it.
+    """
+
+    def __init__(self, cap: int = MAX_OUTPUT_BYTES):
+        """
+        Create an empty buffer.
+
+        Args:
+            cap (int): Maximum number of bytes kept. Defaults to MAX_OUTPUT_BYTES.
+        """
+        # Holds back a character split across chunks until its last byte arrives
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts: List[str] = []
+        self._room = cap
+        self._omitted = 0
+
+    def feed(self, chunk: Union[bytes, memoryview]) -> None:
+        """
+        Add the next chunk read from the stream.
+
+        The chunk is decoded before returning, so its buffer may be reused.
+
+        Args:
+            chunk (Union[bytes, memoryview]): The raw bytes read.
+
+        Returns:
+            None
+        """
+        if len(chunk) > self._room:
+            self._omitted += len(chunk) - self._room
+            chunk = chunk[:self._room]
+        if chunk:
+            self._room -= len(chunk)
+            self._parts.append(self._decoder.decode(chunk))
+
+    def getvalue(self) -> str:
+        """
+        Finish decoding and return the output.
+
+        Returns:
+            str: The output decoded as UTF-8, with a truncation note if it exceeded the cap.
+        """
+        self._parts.append(self._decoder.decode(b"", final=True))
+        self._parts.append(_truncation_note(self._omitted))
+        return "".join(self._parts)
+
+
+async def _drain(stream: asyncio.StreamReader, cap: int = MAX_OUTPUT_BYTES) -> str:
+    """
+    Read a stream to EOF and decode it, keeping at most cap bytes.
+
+    Args:
+        stream (asyncio.StreamReader): The process's stdout or stderr.
+        cap (int): Maximum number of bytes kept. Defaults to MAX_OUTPUT_BYTES.
+
+    Returns:
+        str: The decoded output, with a truncation note if it exceeded the cap.
+    """
+    output = OutputBuffer(cap)
+    while chunk := await stream.read(READ_SIZE):
+        output.feed(chunk)
+    return output.getvalue()
+
+
+# Idle read buffers for _drain_sync, reused across commands and reader threads
+_read_buffers: List[memoryview] = []
+
+
+def _drain_sync(pipe: Any, cap: int = MAX_OUTPUT_BYTES) -> str:
+    """
+    Blocking counterpart of _drain for pipes of a subprocess.Popen.
+
+    Reads go into a buffer taken from _read_buffers rather than allocating
+    a new bytes object per read; OutputBuffer decodes each chunk out of it.
+
+    Args:
+        pipe (Any): The process's stdout or stderr file object.
+        cap (int): Maximum number of bytes kept. Defaults to MAX_OUTPUT_BYTES.
+
+    Returns:
+        str: The decoded output, with a truncation note if it exceeded the cap.
+    """
+    try:
+        view = _read_buffers.pop()
+    except IndexError:
+        view = memoryview(bytearray(READ_SIZE))
+    try:
+        output = OutputBuffer(cap)
+        while count := pipe.readinto1(view):
+            output.feed(view[:count])
+        return output.getvalue()
+    finally:
+        _read_buffers.append(view)
+
+
+async def _deadline(coro: Awaitable[Any], timeout: float) -> Any:
+    """
+    Await a coroutine, cancelling it if it runs longer than timeout seconds.
+
+    A lighter asyncio.wait_for: one task and one timer handle per call.
+
+    Args:
+        coro (Awaitable[Any]): The coroutine to run.
+        timeout (float): Seconds before it is cancelled.
+
+    Returns:
+        Any: What the coroutine returned.
+
+    Raises:
+        asyncio.TimeoutError: If it was cancelled for exceeding the timeout.
+    """
+    task = asyncio.ensure_future(coro)
+    expired = False
+
+    def expire() -> None:
+        nonlocal expired
+        expired = True
+        task.cancel()
+
+    handle = asyncio.get_running_loop().call_later(timeout, expire)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if expired:
+            raise asyncio.TimeoutError() from None
+        raise
+    finally:
+        handle.cancel()
+
+
+def _signal_group(process: Any, hard: bool) -> None:
+    """
+    Signal a process started in its own group, and everything in that group.
+
+    On Windows the polite signal is CTRL_BREAK_EVENT and the hard one
+    terminates the process itself; elsewhere the whole group gets SIGTERM or
+    SIGKILL.
+
+    Args:
+        process (Any): A subprocess.Popen or asyncio.subprocess.Process started with NEW_GROUP.
+        hard (bool): Kill instead of asking the process to stop.
+
+    Returns:
+        None
+    """
+    try:
+        if sys.platform == "win32":
+            if hard:
+                process.kill()
+            else:
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGKILL if hard else signal.SIGTERM)
+    except OSError:
+        # Already gone
+        pass
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> None:
+    """
+    Stop a process and its group, escalating to a kill after KILL_GRACE seconds.
+
+    Args:
+        process (asyncio.subprocess.Process): A process started with NEW_GROUP.
+
+    Returns:
+        None
+    """
+    if process.returncode is None:
+        _signal_group(process, hard=False)
+        try:
+            await asyncio.wait_for(process.wait(), timeout=KILL_GRACE)
+        except asyncio.TimeoutError:
+            _signal_group(process, hard=True)
+            await process.wait()
+    if sys.platform != "win32":
+        # Children that ignored SIGTERM would keep the pipes open
+        _signal_group(process, hard=True)
+
+
+def _terminate_sync(process: subprocess.Popen) -> None:
+    """
+    Blocking counterpart of _terminate for a subprocess.Popen.
+
+    Args:
+        process (subprocess.Popen): A process started with NEW_GROUP.
+
+    Returns:
+        None
+    """
+    if process.poll() is None:
+        _signal_group(process, hard=False)
+        try:
+            process.wait(timeout=KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            _signal_group(process, hard=True)
+            process.wait()
+    if sys.platform != "win32":
+        _signal_group(process, hard=True)
+
+
+def _feed_sync(pipe: Any, data: bytes) -> None:
+    """
+    Write a process's whole input and close its stdin.
+
+    Args:
+        pipe (Any): The process's stdin file object.
+        data (bytes): The input.
+
+    Returns:
+        None
+    """
+    try:
+        pipe.write(data)
+        pipe.close()
+    except OSError:
+        # The process exited without reading all of it
+        pass
+
+
+def _run_sync(
+    argv: List[str],
+    cwd: Optional[str],
+    timeout: float,
+    stdin: Optional[bytes] = None
+) -> Tuple[int, str, str]:
+    """
+    Run a command to completion on the calling thread.
+
+    stdout and stderr are drained and stdin written on helper threads while
+    this one waits for them. Once the timeout passes the process group is
+    terminated; readers still blocked KILL_GRACE seconds later, because a
+    process outside the group holds the pipes open, are abandoned so the
+    timeout is always honoured.
+
+    Args:
+        argv (List[str]): The program and its arguments.
+        cwd (Optional[str]): The directory to run it in.
+        timeout (float): Seconds before the process is killed.
+        stdin (Optional[bytes]): Input written to the process's stdin, if any.
+
+    Returns:
+        Tuple[int, str, str]: The exit code, stdout and stderr.
+
+    Raises:
+        asyncio.TimeoutError: If the process was killed for exceeding the timeout.
+    """
+    process = subprocess.Popen(
+        argv,
+        stdin=None if stdin is None else subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        **NEW_GROUP
+    )
+    deadline = time.monotonic() + timeout
+    output: Dict[str, str] = {}
+    readers = [
+        threading.Thread(
+            target=lambda name, pipe: output.__setitem__(name, _drain_sync(pipe)),
+            args=(name, pipe),
+            daemon=True
+        )
+        for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    if stdin is not None:
+        threading.Thread(target=_feed_sync, args=(process.stdin, stdin), daemon=True).start()
+
+    try:
+        for reader in readers:
+            reader.join(max(deadline - time.monotonic(), 0))
+        if any(reader.is_alive() for reader in readers):
+            raise subprocess.TimeoutExpired(argv, timeout)
+        exit_code = process.wait(max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        _terminate_sync(process)
+        grace = time.monotonic() + KILL_GRACE
+        for reader in readers:
+            reader.join(max(grace - time.monotonic(), 0))
+        raise asyncio.TimeoutError() from None
+    finally:
+        if not any(reader.is_alive() for reader in readers):
+            # Closing a pipe under a blocked reader would wait on its lock
+            process.stdout.close()
+            process.stderr.close()
+
+    return exit_code, output["stdout"], output["stderr"]
+
+
+async def _start_process(
+    argv: List[str],
+    cwd: Optional[str] = None,
+    stdin: bool = False
+) -> Tuple[asyncio.subprocess.Process, List[asyncio.BaseTransport]]:
+    """
+    Start a process in its own group with stdout and stderr piped.
+
+    On Linux the pipes are created here and grown to PIPE_SIZE with
+    F_SETPIPE_SZ before the child gets them, then connected to stream
+    readers that become the process's stdout and stderr. Elsewhere, or with
+    PIPE_SIZE 0, asyncio creates the pipes as usual.
+
+    Args:
+        argv (List[str]): The program and its arguments.
+        cwd (Optional[str]): The directory to start it in.
+        stdin (bool): Pipe the process's stdin as well. Defaults to False.
+
+    Returns:
+        Tuple[asyncio.subprocess.Process, List[asyncio.BaseTransport]]: The
+            process and the read transports to close with _close_pipes once
+            its output is no longer needed.
+    """
+    stdin_pipe = asyncio.subprocess.PIPE if stdin else None
+    if not PIPE_SIZE or not hasattr(fcntl, "F_SETPIPE_SZ"):
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=stdin_pipe,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            **NEW_GROUP
+        )
+        return process, []
+
+    pipes = [os.pipe(), os.pipe()]
+    try:
+        for read_fd, _ in pipes:
+            try:
+                fcntl.fcntl(read_fd, fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+            except OSError:
+                # Above /proc/sys/fs/pipe-max-size: keep the default size
+                pass
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=stdin_pipe,
+            stdout=pipes[0][1],
+            stderr=pipes[1][1],
+            cwd=cwd,
+            **NEW_GROUP
+        )
+    except BaseException:
+        for read_fd, write_fd in pipes:
+            os.close(read_fd)
+            os.close(write_fd)
+        raise
+
+    loop = asyncio.get_running_loop()
+    readers = []
+    transports = []
+    for read_fd, write_fd in pipes:
+        # Only the child writes; EOF then arrives once it and its children exit
+        os.close(write_fd)
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            functools.partial(asyncio.StreamReaderProtocol, reader),
+            os.fdopen(read_fd, "rb", buffering=0)
+        )
+        readers.append(reader)
+        transports.append(transport)
+    process.stdout, process.stderr = readers
+    return process, transports
+
+
+def _close_pipes(transports: List[asyncio.BaseTransport]) -> None:
+    """
+    Close the read transports returned by _start_process.
+
+    Args:
+        transports (List[asyncio.BaseTransport]): The transports to close.
+
+    Returns:
+        None
+    """
+    for transport in transports:
+        transport.close()
+
+
+async def _feed(stream: asyncio.StreamWriter, data: bytes) -> None:
+    """
+    Write a process's whole input and close its stdin.
+
+    Args:
+        stream (asyncio.StreamWriter): The process's stdin.
+        data (bytes): The input.
+
+    Returns:
+        None
+    """
+    try:
+        stream.write(data)
+        await stream.drain()
+        stream.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # The process exited without reading all of it
+        pass
+
+
+async def _communicate(
+    process: asyncio.subprocess.Process,
+    stdin: Optional[bytes] = None
+) -> Tuple[str, str]:
+    """
+    Read stdout and stderr concurrently and wait for the process to exit.
+
+    Args:
+        process (asyncio.subprocess.Process): A process started with both streams piped.
+        stdin (Optional[bytes]): Input written to the process's stdin alongside reading,
+            if it was started with stdin piped.
+
+    Returns:
+        Tuple[str, str]: The bounded, decoded stdout and stderr.
+    """
+    steps = [_drain(process.stdout), _drain(process.stderr), process.wait()]
+    if stdin is not None:
+        steps.append(_feed(process.stdin, stdin))
+    stdout, stderr, *_ = await asyncio.gather(*steps)
+    return stdout, stderr
+
+
+def _bash_script(command: str, working_dir: Optional[str]) -> str:
+    """
+    Wrap a command for a bash that reads commands from stdin.
+
+    The command runs in a subshell so "cd" and "exit" stay local to it, with
+    stdin detached so it cannot read the rest of the script (or, in a pooled
+    shell, the protocol stream).
+
+    Args:
+        command (str): The command to execute.
+        working_dir (Optional[str]): The directory to run it in, in bash's path format.
+
+    Returns:
+        str: The script text.
+    """
+    cd = f"cd -- {shlex.quote(working_dir)} &&\n" if working_dir else ""
+    return f"(\n{cd}{command}\n) < /dev/null\n"
+
+
+def _to_wsl(path: str) -> str:
+    """
+    Convert a Windows path to its WSL mount path, e.g. D:\\src to /mnt/d/src.
+
+    Args:
+        path (str): The Windows path.
+
+    Returns:
+        str: The path as seen from WSL.
+    """
+    return _DRIVE_RE.sub(lambda m: f"/mnt/{m.group(1).lower()}/", path.translate(_BACKSLASH_TBL), count=1)
+
+
+def _to_gitbash(path: str) -> str:
+    """
+    Convert a Windows path to Git Bash format, e.g. D:\\src to /d/src.
+
+    Args:
+        path (str): The Windows path.
+
+    Returns:
+        str: The path as seen from Git Bash.
+    """
+    return _DRIVE_RE.sub(lambda m: f"/{m.group(1).lower()}/", path.translate(_BACKSLASH_TBL), count=1)
+
+
+def _direct_argv(command: str, working_dir: Optional[str]) -> Optional[List[str]]:
+    """
+    Split a CMD command that can be started without cmd.exe.
+
+    Only commands with no shell syntax whose program resolves to an .exe or
+    .com file qualify. Like cmd.exe, the working directory is searched before
+    PATH, and the resolved path is what gets started.
+
+    Args:
+        command (str): The CMD command.
+        working_dir (Optional[str]): The directory it runs in.
+
+    Returns:
+        Optional[List[str]]: The argv to spawn directly, or None to run it through cmd.exe.
+    """
+    if _SHELL_META.search(command):
+        return None
+    argv = command.split()
+    if not argv or argv[0].lower() in CMD_BUILTINS:
+        return None
+    search = os.pathsep.join(filter(None, (working_dir or os.getcwd(), os.environ.get("PATH"))))
+    program = shutil.which(argv[0], path=search)
+    if program is None or not program.lower().endswith(DIRECT_EXTENSIONS):
+        return None
+    argv[0] = program
+    return argv
+
+
+def _error(message: str, shell_name: str) -> Dict[str, Any]:
+    """
+    Build the result of a command that could not be run to completion.
+
+    Args:
+        message (str): What went wrong.
+        shell_name (str): The shell name reported in the result.
+
+    Returns:
+        Dict[str, Any]: The result, with success False.
+    """
+    return {"success": False, "error": message, "shell": shell_name}
+
+
+def to_json(obj: Any) -> str:
+    """
+    Serialize a result as indented JSON text.
+
+    Args:
+        obj (Any): The JSON-serializable result.
+
+    Returns:
+        str: The JSON text, indented by two spaces.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+async def result_to_json(result: Dict[str, Any]) -> str:
+    """
+    Serialize a command result, off the event loop if its output is large.
+
+    Args:
+        result (Dict[str, Any]): The execution result.
+
+    Returns:
+        str: The JSON text, indented by two spaces.
+    """
+    if len(result.get("stdout", "")) + len(result.get("stderr", "")) > OFFLOAD_JSON_BYTES:
+        return await asyncio.to_thread(to_json, result)
+    return to_json(result)
+
+
+@functools.lru_cache(maxsize=1)
+def find_git_bash() -> Optional[str]:
+    """
+    Locate Git Bash installation.
+
+    Checks the common installation paths first and only walks the system
+    PATH if none of them exists. The result is cached, so creating more
+    executors does not search again.
+
+    Returns:
+        Optional[str]: The path to the Git Bash executable, or None if not found.
+    """
+    common_paths = (
+        r"C:\Program Files\Git\bin\bash.exe",
+        r"C:\Program Files (x86)\Git\bin\bash.exe",
+        os.path.expandvars(r"%LOCALAPPDATA%\Programs\Git\bin\bash.exe"),
+    )
+
+    for path in common_paths:
+        if os.path.isfile(path):
+            return path
+
+    # Try to find via PATH
+    git_bash = shutil.which("bash")
+    if git_bash and "git" in git_bash.lower():
+        return git_bash
+
+    return None
+
+
+class PersistentShell:
+    """
+    A long-lived shell process that runs commands sent over stdin.
+
+    After each command the shell prints a per-command end marker with the
+    exit code to stdout, and the marker alone to stderr, so the output of
+    one command can be split from the next without restarting the shell.
+    """
+
+    def __init__(self, kind: str, argv: List[str]):
+        """
+        Create a shell that is started on first use.
+
+        Args:
+            kind (str): The shell type: "cmd", "powershell", "wsl" or "gitbash".
+            argv (List[str]): The command line that starts the shell reading stdin.
+        """
+        self.kind = kind
+        self.argv = argv
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._pipes: List[asyncio.BaseTransport] = []
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the shell process is running."""
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """
+        Start the shell process if it is not already running.
+
+        Returns:
+            None
+        """
+        async with self._start_lock:
+            if not self.alive:
+                self.process, self._pipes = await _start_process(self.argv, stdin=True)
+                # Discard any startup banner by running one no-op command
+                await self._exchange(NOOP_COMMANDS[self.kind], None)
+
+    def kill(self) -> None:
+        """
+        Kill the shell process and anything it started; the next command starts a new one.
+
+        Returns:
+            None
+        """
+        if self.process is not None:
+            _signal_group(self.process, hard=True)
+        _close_pipes(self._pipes)
+        self.process = None
+        self._pipes = []
+
+    async def close(self) -> None:
+        """
+        Kill the shell process and wait for it to exit.
+
+        Returns:
+            None
+        """
+        process = self.process
+        self.kill()
+        if process is not None:
+            await process.wait()
+
+    async def run(self, command: str, working_dir: Optional[str] = None) -> Tuple[int, bytes, bytes]:
+        """
+        Run one command in the shell, starting the shell if needed.
+
+        Args:
+            command (str): The command to execute.
+            working_dir (Optional[str]): The directory to run it in, in the shell's own path format.
+
+        Returns:
+            Tuple[int, bytes, bytes]: The exit code, stdout and stderr.
+        """
+        await self.start()
+        return await self._exchange(command, working_dir)
+
+    async def _exchange(self, command: str, working_dir: Optional[str]) -> Tuple[int, bytes, bytes]:
+        """
+        Send one command to the running shell and read its output.
+
+        Args:
+            command (str): The command to execute.
+            working_dir (Optional[str]): The directory to run it in.
+
+        Returns:
+            Tuple[int, bytes, bytes]: The exit code, stdout and stderr.
+        """
+        process = self.process
 
-from mcp.server import Server
-from mcp.types import Tool, TextContent
-import mcp.server.stdio
+        marker = f"__MCP_END_{secrets.token_hex(8)}__"
+        process.stdin.write(self._script(command, working_dir, marker).encode("utf-8"))
+        await process.stdin.drain()
+
+        (stdout, exit_code), (stderr, _) = await asyncio.gather(
+            self._read_until(process.stdout, marker.encode()),
+            self._read_until(process.stderr, marker.encode())
+        )
+
+        if exit_code is None:
+            # The command ended the shell itself (e.g. "exit")
+            exit_code = await process.wait()
+            self.process = None
+
+        return exit_code, stdout, stderr
+
+    def _script(self, command: str, working_dir: Optional[str], marker: str) -> str:
+        """
+        Wrap a command with the directory change and end markers for this shell.
+
+        Args:
+            command (str): The command to execute.
+            working_dir (Optional[str]): The directory to run it in.
+            marker (str): The end marker for this command.
+
+        Returns:
+            str: The text to write to the shell's stdin.
+        """
+        if self.kind == "powershell":
+            # One line per command, so multi-line scripts are passed encoded
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            script = (
+                "[ScriptBlock]::Create([Text.Encoding]::UTF8.GetString("
+                f"[Convert]::FromBase64String('{encoded}')))"
+            )
+            push = pop = ""
+            if working_dir:
+                push = "Push-Location -LiteralPath '{}'; ".format(working_dir.replace("'", "''"))
+                pop = "Pop-Location"
+            return (
+                "$global:LASTEXITCODE = 0; $__mcp_ok = $true; "
+                f"try {{ {push}& ({script}); $__mcp_ok = $? }} "
+                "catch { [Console]::Error.WriteLine($_); $__mcp_ok = $false } "
+                f"finally {{ {pop} }}; "
+                "$__mcp_code = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($__mcp_ok) { 0 } else { 1 }; "
+                f"[Console]::Out.WriteLine(\"`n{marker}$__mcp_code\"); "
+                f"[Console]::Error.WriteLine(\"`n{marker}\")\n"
+            )
+
+        if self.kind == "cmd":
+            lines = []
+            if working_dir:
+                lines.append(f'pushd "{working_dir}"')
+            lines.append(command)
+            lines.append("set __MCP_CODE=%ERRORLEVEL%")
+            if working_dir:
+                lines.append("popd")
+            lines.extend([
+                "echo.",
+                f"echo {marker}%__MCP_CODE%",
+                "1>&2 echo.",
+                f"1>&2 echo {marker}",
+            ])
+            return "\r\n".join(lines) + "\r\n"
+
+        # bash (WSL and Git Bash)
+        return (
+            _bash_script(command, working_dir) +
+            f"printf '\\n{marker}%d\\n' $?\n"
+            f"printf '\\n{marker}\\n' >&2\n"
+        )
+
+    @staticmethod
+    async def _read_until(stream: asyncio.StreamReader, marker: bytes) -> Tuple[bytes, Optional[int]]:
+        """
+        Read a stream up to a command's end marker.
+
+        Args:
+            stream (asyncio.StreamReader): The shell's stdout or stderr.
+            marker (bytes): The end marker for the command.
+
+        Returns:
+            Tuple[bytes, Optional[int]]: The output before the marker and the exit
+                code printed after it, or None for the code if the stream ended first.
+        """
+        buffer = bytearray()
+        searched = 0
+        omitted = 0
+
+        while True:
+            position = buffer.find(marker, max(searched - len(marker), 0))
+            if position != -1:
+                line_end = buffer.find(b"\n", position)
+                if line_end != -1:
+                    break
+            else:
+                if len(buffer) > MAX_OUTPUT_BYTES + len(marker):
+                    # Keep the first MAX_OUTPUT_BYTES, plus enough of the end
+                    # to find a marker that arrives split across reads
+                    omitted += len(buffer) - MAX_OUTPUT_BYTES - len(marker)
+                    del buffer[MAX_OUTPUT_BYTES:-len(marker)]
+                searched = len(buffer)
+
+            chunk = await stream.read(READ_SIZE)
+            if not chunk:
+                if len(buffer) > MAX_OUTPUT_BYTES:
+                    omitted += len(buffer) - MAX_OUTPUT_BYTES
+                    del buffer[MAX_OUTPUT_BYTES:]
+                return _with_omitted(buffer, omitted), None
+            buffer += chunk
+
+        code = buffer[position + len(marker):line_end].strip()
+        exit_code = int(code) if code else 0
+
+        # Drop the line break written just before the marker
+        if buffer.endswith(b"\r\n", 0, position):
+            position -= 2
+        elif buffer.endswith(b"\n", 0, position):
+            position -= 1
+
+        if position > MAX_OUTPUT_BYTES:
+            # Whatever arrived between the cap and the marker is dropped too
+            omitted += position - MAX_OUTPUT_BYTES
+            return _with_omitted(buffer[:MAX_OUTPUT_BYTES], omitted), exit_code
+        return bytes(buffer[:position]), exit_code
+
+
+class ShellPool:
+    """
+    A fixed set of warm PersistentShell processes for one shell type.
+
+    Each command takes an idle shell from the queue and returns it when
+    done. A shell whose command timed out is killed and restarted in the
+    background so a stuck command never blocks later ones.
+    """
+
+    def __init__(self, kind: str, argv: List[str], size: int):
+        """
+        Create the pool; shells are started by warm() or on first use.
+
+        Args:
+            kind (str): The shell type: "cmd", "powershell", "wsl" or "gitbash".
+            argv (List[str]): The command line that starts one shell.
+            size (int): Number of shells kept running.
+        """
+        self.shells = [PersistentShell(kind, argv) for _ in range(max(size, 1))]
+        self.idle: asyncio.Queue = asyncio.Queue()
+        for shell in self.shells:
+            self.idle.put_nowait(shell)
+        self._tasks: set = set()
+
+    def warm(self) -> None:
+        """
+        Start every shell in the background.
+
+        Returns:
+            None
+        """
+        for shell in self.shells:
+            self._spawn(shell)
+
+    async def acquire(self) -> PersistentShell:
+        """
+        Wait for an idle shell.
+
+        Returns:
+            PersistentShell: A shell reserved for one command.
+        """
+        return await self.idle.get()
+
+    def release(self, shell: PersistentShell) -> None:
+        """
+        Return a shell to the pool, restarting it if it is no longer running.
+
+        Args:
+            shell (PersistentShell): The shell taken with acquire().
+
+        Returns:
+            None
+        """
+        if not shell.alive:
+            self._spawn(shell)
+        self.idle.put_nowait(shell)
+
+    async def close(self) -> None:
+        """
+        Stop every shell in the pool.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*(shell.close() for shell in self.shells))
+
+    def _spawn(self, shell: PersistentShell) -> None:
+        task = asyncio.ensure_future(shell.start())
+        self._tasks.add(task)
+        task.add_done_callback(self._spawned)
+
+    def _spawned(self, task: asyncio.Future) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled():
+            # Start failures surface when the shell is next used
+            task.exception()
 
 
 class ShellExecutor:
@@ -30,37 +1003,284 @@ class ShellExecutor:
         """
         Initialize the ShellExecutor.
 
-        Sets up default timeout and locates Git Bash installation.
+        Sets up default timeout, locates Git Bash installation and creates
+        the persistent shell pools selected with MCP_SHELL_POOL.
         """
         self.default_timeout = 30
-        self.git_bash_path = self._find_git_bash()
+        self.git_bash_path = find_git_bash()
+        self.pools = self._create_pools()
+        self._wsl_available: Optional[bool] = None
+        self._wsl_lock = asyncio.Lock()
+        self._wsl_keepalive: Optional[asyncio.Task] = None
+        self._spawn_pool: Optional[ThreadPoolExecutor] = None
+        self._spawn_slots = {kind: asyncio.Semaphore(limit) for kind, limit in SPAWN_LIMITS.items()}
+
+    def _create_pools(self) -> Dict[str, ShellPool]:
+        """
+        Create a pool of persistent shells for each shell in POOL_SHELLS.
+
+        Returns:
+            Dict[str, ShellPool]: The pools by shell type.
+        """
+        commands = {
+            "cmd": ["cmd.exe", "/D", "/Q"],
+            "powershell": [*POWERSHELL_ARGS, "-Command", "-"],
+            "wsl": ["wsl.exe", "-e", "bash"],
+        }
+        if self.git_bash_path:
+            commands["gitbash"] = [self.git_bash_path]
+
+        return {
+            kind: ShellPool(kind, argv, POOL_SIZE)
+            for kind, argv in commands.items()
+            if kind in POOL_SHELLS
+        }
+
+    def warm_pools(self) -> None:
+        """
+        Start the pooled shells in the background so the first calls find them ready.
 
-    def _find_git_bash(self) -> Optional[str]:
+        Returns:
+            None
         """
-        Locate Git Bash installation.
+        for pool in self.pools.values():
+            pool.warm()
 
-        Searches common installation paths and the system PATH to find the
-        Git Bash executable.
+    async def close(self) -> None:
+        """
+        Stop all pooled shells, the WSL keep-alive and the spawn threads.
 
         Returns:
-            Optional[str]: The path to the Git Bash executable, or None if not found.
+            None
         """
-        common_paths = [
-            r"C:\Program Files\Git\bin\bash.exe",
-            r"C:\Program Files (x86)\Git\bin\bash.exe",
-            os.path.expandvars(r"%LOCALAPPDATA%\Programs\Git\bin\bash.exe")
-        ]
+        if self._wsl_keepalive is not None:
+            self._wsl_keepalive.cancel()
+        if self._spawn_pool is not None:
+            self._spawn_pool.shutdown(wait=False)
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
 
-        for path in common_paths:
-            if os.path.exists(path):
-                return path
+    async def _check_wsl(self) -> bool:
+        """
+        Check once whether WSL is usable, caching the answer.
 
-        # Try to find via PATH
-        git_bash = shutil.which("bash")
-        if git_bash and "git" in git_bash.lower():
-            return git_bash
+        The wsl.exe --status probe is only repeated after a command showed
+        that WSL's availability changed.
 
-        return None
+        Returns:
+            bool: True if WSL is installed and configured.
+        """
+        if self._wsl_available is not None:
+            return self._wsl_available
+
+        async with self._wsl_lock:
+            if self._wsl_available is None:
+                try:
+                    wsl_check = await asyncio.create_subprocess_exec(
+                        "wsl.exe",
+                        "--status",
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    await wsl_check.communicate()
+                except OSError:
+                    # wsl.exe is not on this system
+                    self._wsl_available = False
+                    return False
+                self._wsl_available = wsl_check.returncode == 0
+
+                if self._wsl_available:
+                    self._start_wsl_keepalive()
+
+        return self._wsl_available
+
+    def _start_wsl_keepalive(self) -> None:
+        """
+        Start waking the WSL VM periodically so it is not suspended between calls.
+
+        Not needed when pooled WSL shells already keep a session open.
+
+        Returns:
+            None
+        """
+        if WSL_KEEPALIVE > 0 and "wsl" not in self.pools and self._wsl_keepalive is None:
+            self._wsl_keepalive = asyncio.ensure_future(self._keep_wsl_alive())
+
+    async def _keep_wsl_alive(self) -> None:
+        """
+        Run a no-op WSL command every WSL_KEEPALIVE seconds until cancelled.
+
+        Returns:
+            None
+        """
+        while True:
+            await asyncio.sleep(WSL_KEEPALIVE)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "wsl.exe",
+                    "-e",
+                    "true",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                await process.wait()
+            except OSError:
+                # wsl.exe went away; the next command re-checks
+                self._wsl_available = None
+                self._wsl_keepalive = None
+                return
+
+    async def _execute_pooled(
+        self,
+        kind: str,
+        command: str,
+        working_dir: Optional[str],
+        timeout_val: int
+    ) -> Tuple[int, str, str]:
+        """
+        Execute a command in a warm shell from the pool.
+
+        Args:
+            kind (str): The pool to use: "cmd", "powershell", "wsl" or "gitbash".
+            command (str): The command to execute.
+            working_dir (Optional[str]): The directory to execute in, in the shell's path format.
+            timeout_val (int): Seconds for the wait for an idle shell and the command.
+
+        Returns:
+            Tuple[int, str, str]: The exit code, stdout and stderr.
+
+        Raises:
+            ValueError: If a Windows working directory does not exist.
+            asyncio.TimeoutError: If the command exceeded the timeout.
+        """
+        if working_dir and kind in ("cmd", "powershell") and not os.path.isdir(working_dir):
+            raise ValueError(f"Working directory not found: {working_dir}")
+
+        # Waiting for an idle shell counts toward the timeout
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pool = self.pools[kind]
+        shell = await _deadline(pool.acquire(), timeout_val)
+        try:
+            exit_code, stdout, stderr = await _deadline(
+                shell.run(command, working_dir), timeout_val - (loop.time() - started)
+            )
+        except BaseException:
+            # The command may still be running: replace the shell, never reuse it
+            shell.kill()
+            raise
+        finally:
+            pool.release(shell)
+
+        return exit_code, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+
+    async def _spawn(
+        self,
+        argv: List[str],
+        cwd: Optional[str],
+        timeout_val: float,
+        threaded: bool = USE_THREAD_SPAWN,
+        stdin: Optional[bytes] = None
+    ) -> Tuple[int, str, str]:
+        """
+        Run a one-shot command and collect its output.
+
+        Args:
+            argv (List[str]): The program and its arguments.
+            cwd (Optional[str]): The directory to run it in.
+            timeout_val (float): Execution timeout in seconds.
+            threaded (bool): Run subprocess.Popen on the spawn thread pool instead of
+                an asyncio subprocess. Defaults to USE_THREAD_SPAWN.
+            stdin (Optional[bytes]): Input written to the command's stdin, if any.
+
+        Returns:
+            Tuple[int, str, str]: The exit code, stdout and stderr.
+
+        Raises:
+            asyncio.TimeoutError: If the command exceeded the timeout.
+        """
+        if threaded:
+            if self._spawn_pool is None:
+                self._spawn_pool = ThreadPoolExecutor(
+                    max_workers=SPAWN_WORKERS, thread_name_prefix="shell-spawn"
+                )
+            return await asyncio.get_running_loop().run_in_executor(
+                self._spawn_pool, _run_sync, argv, cwd, timeout_val, stdin
+            )
+
+        process, pipes = await _start_process(argv, cwd, stdin is not None)
+
+        try:
+            stdout, stderr = await _deadline(_communicate(process, stdin), timeout_val)
+        except BaseException:
+            # Timed out or cancelled: stop the command and everything it started
+            await asyncio.shield(_terminate(process))
+            raise
+        finally:
+            _close_pipes(pipes)
+        return process.returncode, stdout, stderr
+
+    async def _run(
+        self,
+        kind: str,
+        argv: List[str],
+        command: str,
+        working_dir: Optional[str],
+        timeout: Optional[int],
+        cwd: Optional[str] = None,
+        threaded: bool = USE_THREAD_SPAWN,
+        stdin: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a command in a pooled shell if there is one, otherwise in a new process.
+
+        Args:
+            kind (str): The shell: "cmd", "powershell", "wsl" or "gitbash".
+            argv (List[str]): The one-shot command line.
+            command (str): The command as sent to a pooled shell.
+            working_dir (Optional[str]): The directory for a pooled shell, in the shell's path format.
+            timeout (Optional[int]): Execution timeout in seconds, including any wait
+                for a free slot or pooled shell.
+            cwd (Optional[str]): The directory to start the one-shot process in.
+            threaded (bool): Spawn the one-shot process on the spawn thread pool.
+            stdin (Optional[bytes]): Input written to the one-shot process's stdin, if any.
+
+        Returns:
+            Dict[str, Any]: The execution results, or the error with success False.
+        """
+        shell_name = SHELL_NAMES[kind]
+        timeout_val = timeout or self.default_timeout
+        try:
+            if kind in self.pools:
+                exit_code, stdout, stderr = await self._execute_pooled(
+                    kind, command, working_dir, timeout_val
+                )
+            else:
+                # The wait for a slot counts toward the timeout
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                slot = self._spawn_slots[kind]
+                await _deadline(slot.acquire(), timeout_val)
+                try:
+                    exit_code, stdout, stderr = await self._spawn(
+                        argv, cwd, timeout_val - (loop.time() - started), threaded, stdin
+                    )
+                finally:
+                    slot.release()
+        except asyncio.TimeoutError:
+            return _error(f"Command timed out after {timeout_val} seconds", shell_name)
+        except Exception as e:
+            if kind == "wsl" and isinstance(e, OSError):
+                # wsl.exe could not be started; check again next time
+                self._wsl_available = None
+            return _error(str(e), shell_name)
+
+        return {
+            "success": True,
+            "exit_code": exit_code,
+            "stdout": stdout,
+            "stderr": stderr,
+            "shell": shell_name
+        }
 
     async def execute_cmd(
         self,
@@ -85,43 +1305,11 @@ class ShellExecutor:
                 - shell (str): "CMD".
                 - error (str): Error message if execution failed (e.g. timeout).
         """
-        try:
-            timeout_val = timeout or self.default_timeout
-
-            process = await asyncio.create_subprocess_exec(
-                "cmd.exe",
-                "/c",
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=working_dir
-            )
-
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout_val
-            )
-
-            return {
-                "success": True,
-                "exit_code": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='replace'),
-                "stderr": stderr.decode('utf-8', errors='replace'),
-                "shell": "CMD"
-            }
-
-        except asyncio.TimeoutError:
-            return {
-                "success": False,
-                "error": f"Command timed out after {timeout_val} seconds",
-                "shell": "CMD"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "shell": "CMD"
-            }
+        # Plain "program args" lines skip the cmd.exe startup, unless CMD is pooled
+        argv = None if "cmd" in self.pools else _direct_argv(command, working_dir)
+        return await self._run(
+            "cmd", argv or ["cmd.exe", "/c", command], command, working_dir, timeout, working_dir
+        )
 
     async def execute_powershell(
         self,
@@ -146,46 +1334,10 @@ class ShellExecutor:
                 - shell (str): "PowerShell".
                 - error (str): Error message if execution failed.
         """
-        try:
-            timeout_val = timeout or self.default_timeout
-
-            # Use -NoProfile for faster startup and -NonInteractive for automation
-            process = await asyncio.create_subprocess_exec(
-                "powershell.exe",
-                "-NoProfile",
-                "-NonInteractive",
-                "-Command",
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=working_dir
-            )
-
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout_val
-            )
-
-            return {
-                "success": True,
-                "exit_code": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='replace'),
-                "stderr": stderr.decode('utf-8', errors='replace'),
-                "shell": "PowerShell"
-            }
-
-        except asyncio.TimeoutError:
-            return {
-                "success": False,
-                "error": f"Command timed out after {timeout_val} seconds",
-                "shell": "PowerShell"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "shell": "PowerShell"
-            }
+        # Use POWERSHELL_ARGS for faster startup and -NonInteractive for automation
+        return await self._run(
+            "powershell", [*POWERSHELL_ARGS, "-Command", command], command, working_dir, timeout, working_dir
+        )
 
     async def execute_wsl(
         self,
@@ -210,67 +1362,33 @@ class ShellExecutor:
                 - shell (str): "WSL/Ubuntu" or "WSL".
                 - error (str): Error message if execution failed or WSL not found.
         """
-        try:
-            timeout_val = timeout or self.default_timeout
-
-            # Check if WSL is available
-            wsl_check = await asyncio.create_subprocess_exec(
-                "wsl.exe",
-                "--status",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await wsl_check.communicate()
-
-            if wsl_check.returncode != 0:
-                return {
-                    "success": False,
-                    "error": "WSL is not installed or not configured properly",
-                    "shell": "WSL"
-                }
-
-            # Convert Windows path to WSL path if working_dir is provided
-            wsl_command = command
-            if working_dir:
-                # Convert Windows path to WSL path
-                wsl_path = working_dir.replace("\\", "/").replace("C:", "/mnt/c")
-                wsl_command = f"cd {wsl_path} && {command}"
-
-            process = await asyncio.create_subprocess_exec(
-                "wsl.exe",
-                "-e",
-                "bash",
-                "-c",
-                wsl_command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout_val
-            )
+        # Convert Windows path to WSL path if working_dir is provided
+        wsl_path = _to_wsl(working_dir) if working_dir else None
+
+        # The script goes on stdin, not the Windows command line with its quoting
+        # rules and 32K limit. WSL stays on the asyncio path, where its startup is not slower
+        if self._wsl_available is None:
+            if "wsl" in self.pools:
+                # Let the pooled shells start while wsl.exe --status runs; the
+                # command itself is only sent once WSL is known to be usable
+                self.pools["wsl"].warm()
+            await self._check_wsl()
+        if not self._wsl_available:
+            return _error("WSL is not installed or not configured properly", "WSL")
+
+        result = await self._run(
+            "wsl", ["wsl.exe", "-e", "bash", "-s"], command, wsl_path, timeout,
+            threaded=False, stdin=_bash_script(command, wsl_path).encode("utf-8")
+        )
 
-            return {
-                "success": True,
-                "exit_code": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='replace'),
-                "stderr": stderr.decode('utf-8', errors='replace'),
-                "shell": "WSL/Ubuntu"
-            }
-
-        except asyncio.TimeoutError:
-            return {
-                "success": False,
-                "error": f"Command timed out after {timeout_val} seconds",
-                "shell": "WSL"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "shell": "WSL"
-            }
+        if not result["success"]:
+            result["shell"] = "WSL"
+        elif result["exit_code"] != 0:
+            # wsl.exe writes its own messages as UTF-16
+            message = result["stderr"].replace("\x00", "").lower()
+            if any(marker in message for marker in WSL_MISSING_MARKERS):
+                self._wsl_available = None
+        return result
 
     async def execute_gitbash(
         self,
@@ -295,180 +1413,136 @@ class ShellExecutor:
                 - shell (str): "Git Bash".
                 - error (str): Error message if execution failed or Git Bash not found.
         """
-        try:
-            if not self.git_bash_path:
-                return {
-                    "success": False,
-                    "error": "Git Bash not found. Please install Git for Windows.",
-                    "shell": "Git Bash"
-                }
-
-            timeout_val = timeout or self.default_timeout
+        if not self.git_bash_path:
+            return _error("Git Bash not found. Please install Git for Windows.", "Git Bash")
 
-            # Convert Windows path to Git Bash format if needed
-            bash_command = command
-            if working_dir:
-                # Convert to Git Bash path format
-                git_path = working_dir.replace("\\", "/")
-                if git_path[1] == ":":
-                    git_path = "/" + git_path[0].lower() + git_path[2:]
-                bash_command = f"cd {git_path} && {command}"
-
-            process = await asyncio.create_subprocess_exec(
-                self.git_bash_path,
-                "-c",
-                bash_command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+        # Convert Windows path to Git Bash format if needed
+        git_path = _to_gitbash(working_dir) if working_dir else None
 
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout_val
-            )
-
-            return {
-                "success": True,
-                "exit_code": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='replace'),
-                "stderr": stderr.decode('utf-8', errors='replace'),
-                "shell": "Git Bash"
-            }
-
-        except asyncio.TimeoutError:
-            return {
-                "success": False,
-                "error": f"Command timed out after {timeout_val} seconds",
-                "shell": "Git Bash"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "shell": "Git Bash"
-            }
+        return await self._run(
+            "gitbash", [self.git_bash_path, "-s"], command, git_path, timeout,
+            stdin=_bash_script(command, git_path).encode("utf-8")
+        )
 
 
-# Initialize MCP Server
-app = Server("shell-executor")
 executor = ShellExecutor()
 
+# Tool name to the executor method that runs it
+DISPATCH: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {
+    "execute_cmd": executor.execute_cmd,
+    "execute_powershell": executor.execute_powershell,
+    "execute_wsl": executor.execute_wsl,
+    "execute_gitbash": executor.execute_gitbash,
+}
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """
-    List available shell execution tools.
 
-    Returns:
-        list[Tool]: A list of available tools for executing commands in different shells.
-    """
-    return [
-        Tool(
-            name="execute_cmd",
-            description="Execute a command in Windows Command Prompt (CMD). "
+# Tool definitions as plain data; create_app turns them into mcp Tool objects once
+TOOL_SPECS: List[Dict[str, Any]] = [
+    {
+        "name": "execute_cmd",
+        "description": "Execute a command in Windows Command Prompt (CMD). "
                        "Use for Windows-native commands like dir, copy, del, etc.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "The command to execute in CMD"
-                    },
-                    "working_dir": {
-                        "type": "string",
-                        "description": "Optional working directory for command execution"
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Optional timeout in seconds (default: 30)"
-                    }
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "The command to execute in CMD"
                 },
-                "required": ["command"]
-            }
-        ),
-        Tool(
-            name="execute_powershell",
-            description="Execute a command or script in PowerShell. "
+                "working_dir": {
+                    "type": "string",
+                    "description": "Optional working directory for command execution"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Optional timeout in seconds (default: 30)"
+                }
+            },
+            "required": ["command"]
+        }
+    },
+    {
+        "name": "execute_powershell",
+        "description": "Execute a command or script in PowerShell. "
                        "Use for PowerShell cmdlets, .NET operations, and advanced Windows scripting.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "The PowerShell command or script to execute"
-                    },
-                    "working_dir": {
-                        "type": "string",
-                        "description": "Optional working directory for command execution"
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Optional timeout in seconds (default: 30)"
-                    }
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "The PowerShell command or script to execute"
                 },
-                "required": ["command"]
-            }
-        ),
-        Tool(
-            name="execute_wsl",
-            description="Execute a command in WSL (Windows Subsystem for Linux) / Ubuntu. "
+                "working_dir": {
+                    "type": "string",
+                    "description": "Optional working directory for command execution"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Optional timeout in seconds (default: 30)"
+                }
+            },
+            "required": ["command"]
+        }
+    },
+    {
+        "name": "execute_wsl",
+        "description": "Execute a command in WSL (Windows Subsystem for Linux) / Ubuntu. "
                        "Use for Linux commands, bash scripts, and Unix utilities.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "The bash/Linux command to execute in WSL"
-                    },
-                    "working_dir": {
-                        "type": "string",
-                        "description": "Optional Windows working directory (will be converted to WSL path)"
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Optional timeout in seconds (default: 30)"
-                    }
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "The bash/Linux command to execute in WSL"
                 },
-                "required": ["command"]
-            }
-        ),
-        Tool(
-            name="execute_gitbash",
-            description="Execute a command in Git Bash. "
+                "working_dir": {
+                    "type": "string",
+                    "description": "Optional Windows working directory (will be converted to WSL path)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Optional timeout in seconds (default: 30)"
+                }
+            },
+            "required": ["command"]
+        }
+    },
+    {
+        "name": "execute_gitbash",
+        "description": "Execute a command in Git Bash. "
                        "Use for Git operations and Unix-like commands on Windows.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "The bash command to execute in Git Bash"
-                    },
-                    "working_dir": {
-                        "type": "string",
-                        "description": "Optional Windows working directory"
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Optional timeout in seconds (default: 30)"
-                    }
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "The bash command to execute in Git Bash"
                 },
-                "required": ["command"]
-            }
-        )
-    ]
+                "working_dir": {
+                    "type": "string",
+                    "description": "Optional Windows working directory"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Optional timeout in seconds (default: 30)"
+                }
+            },
+            "required": ["command"]
+        }
+    }
+]
 
 
-@app.call_tool()
-async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+async def handle_call(name: str, arguments: dict) -> str:
     """
-    Handle tool execution requests.
+    Run a tool call and serialize its result.
 
     Args:
         name (str): The name of the tool to execute.
         arguments (dict): The arguments passed to the tool.
 
     Returns:
-        list[TextContent]: The result of the command execution or an error message.
+        str: The result of the command execution or an error message, as JSON text.
     """
 
     try:
@@ -477,45 +1551,72 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         timeout = arguments.get("timeout")
 
         if not command:
-            return [TextContent(
-                type="text",
-                text=json.dumps({
-                    "success": False,
-                    "error": "Command parameter is required"
-                }, indent=2)
-            )]
-
-        # Execute based on tool name
-        if name == "execute_cmd":
-            result = await executor.execute_cmd(command, working_dir, timeout)
-        elif name == "execute_powershell":
-            result = await executor.execute_powershell(command, working_dir, timeout)
-        elif name == "execute_wsl":
-            result = await executor.execute_wsl(command, working_dir, timeout)
-        elif name == "execute_gitbash":
-            result = await executor.execute_gitbash(command, working_dir, timeout)
-        else:
-            return [TextContent(
-                type="text",
-                text=json.dumps({
-                    "success": False,
-                    "error": f"Unknown tool: {name}"
-                }, indent=2)
-            )]
-
-        return [TextContent(
-            type="text",
-            text=json.dumps(result, indent=2)
-        )]
+            return to_json({
+                "success": False,
+                "error": "Command parameter is required"
+            })
 
-    except Exception as e:
-        return [TextContent(
-            type="text",
-            text=json.dumps({
+        execute = DISPATCH.get(name)
+        if execute is None:
+            return to_json({
                 "success": False,
-                "error": f"Unexpected error: {str(e)}"
-            }, indent=2)
-        )]
+                "error": f"Unknown tool: {name}"
+            })
+
+        result = await execute(command, working_dir, timeout)
+        return await result_to_json(result)
+
+    except Exception as e:
+        return to_json({
+            "success": False,
+            "error": f"Unexpected error: {str(e)}"
+        })
+
+
+def create_app() -> "Server":
+    """
+    Build the MCP server and register its handlers.
+
+    mcp is imported here rather than at module level: importing it takes
+    hundreds of milliseconds, which loading this module for its executor or
+    tool definitions does not need to pay.
+
+    Returns:
+        Server: The configured server.
+    """
+    from mcp.server import Server
+    from mcp.types import Tool, TextContent
+
+    app = Server("shell-executor")
+    # Built once: the tool definitions never change while the server runs
+    tools = [Tool(**spec) for spec in TOOL_SPECS]
+
+    @app.list_tools()
+    async def list_tools() -> list[Tool]:
+        """
+        List available shell execution tools.
+
+        Returns:
+            list[Tool]: A list of available tools for executing commands in different shells.
+        """
+        return tools
+
+    @app.call_tool()
+    async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+        """
+        Handle tool execution requests.
+
+        Args:
+            name (str): The name of the tool to execute.
+            arguments (dict): The arguments passed to the tool.
+
+        Returns:
+            list[TextContent]: The result of the command execution or an error message.
+        """
+        # A single TextContent: stdio_server sends each response as one line with one write and one flush
+        return [TextContent(type="text", text=await handle_call(name, arguments))]
+
+    return app
 
 
 async def main():
@@ -530,12 +1631,19 @@ async def main():
     Returns:
         None
     """
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    from mcp.server.stdio import stdio_server
+
+    app = create_app()
+    async with stdio_server() as (read_stream, write_stream):
+        executor.warm_pools()
+        try:
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+        finally:
+            await executor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""
+Offline tests for the terminal execution MCP server.
+
+Bash stands in for the Windows shells: each test builds its own
+ShellExecutor and points the Git Bash path, or a pooled shell, at it.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+import server
+
+BASH = shutil.which("bash")
+
+needs_bash = pytest.mark.skipif(BASH is None, reason="bash is not installed")
+needs_procfs = pytest.mark.skipif(
+    not os.path.isdir("/proc/self/fd"), reason="needs /proc to inspect processes"
+)
+
+
+def is_running(pid: int) -> bool:
+    """Whether a process exists and is not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def bash_executor(pooled: bool = False) -> server.ShellExecutor:
+    """A ShellExecutor that runs execute_gitbash commands in bash."""
+    executor = server.ShellExecutor()
+    executor.git_bash_path = BASH
+    executor.pools = {"gitbash": server.ShellPool("gitbash", [BASH], 1)} if pooled else {}
+    return executor
+
+
+@needs_bash
+def test_pooled_shell_reports_exit_code():
+    async def run():
+        executor = bash_executor(pooled=True)
+        try:
+            first = await executor.execute_gitbash("echo out; echo err >&2; exit 3")
+            second = await executor.execute_gitbash("echo again")
+        finally:
+            await executor.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == {
+        "success": True, "exit_code": 3, "stdout": "out\n", "stderr": "err\n", "shell": "Git Bash",
+    }
+    assert second["exit_code"] == 0
+    assert second["stdout"] == "again\n"
+
+
+@needs_bash
+@pytest.mark.parametrize("pooled", [False, True])
+def test_working_dir_applies_to_one_command(tmp_path, pooled):
+    async def run():
+        executor = bash_executor(pooled)
+        try:
+            inside = await executor.execute_gitbash("pwd", str(tmp_path))
+            after = await executor.execute_gitbash("pwd")
+        finally:
+            await executor.close()
+        return inside, after
+
+    inside, after = asyncio.run(run())
+
+    assert inside["stdout"] == f"{tmp_path}\n"
+    assert after["stdout"] != inside["stdout"]
+
+
+@needs_bash
+@needs_procfs
+@pytest.mark.parametrize("threaded", [False, True])
+def test_timeout_stops_process_group_without_leaks(tmp_path, threaded):
+    pid_file = tmp_path / "child.pid"
+    argv = [BASH, "-c", f"sleep 30 & echo $! > {pid_file}; wait"]
+
+    async def run():
+        executor = server.ShellExecutor()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await executor._spawn(argv, None, 1, threaded)
+        finally:
+            await executor.close()
+
+    fds_before = len(os.listdir("/proc/self/fd"))
+    started = time.monotonic()
+    asyncio.run(run())
+
+    assert time.monotonic() - started < 1 + server.KILL_GRACE + 1
+    child = int(pid_file.read_text())
+    deadline = time.monotonic() + server.KILL_GRACE
+    while is_running(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not is_running(child)
+    assert len(os.listdir("/proc/self/fd")) == fds_before
+
+
+@pytest.mark.parametrize("setting, limit", [("0", 1), ("-3", 1), ("5", 5)])
+def test_max_concurrent_is_at_least_one(setting, limit):
+    env = dict(os.environ, MCP_MAX_CONCURRENT=setting)
+    result = subprocess.run(
+        [sys.executable, "-c", "import server; print(set(server.SPAWN_LIMITS.values()))"],
+        cwd=os.path.dirname(server.__file__), env=env, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip() == str({limit})
+
+
+@needs_bash
+@pytest.mark.parametrize("pooled", [False, True])
+def test_waiting_for_a_slot_counts_toward_the_timeout(pooled):
+    async def run():
+        executor = bash_executor(pooled)
+        executor._spawn_slots["gitbash"] = asyncio.Semaphore(1)
+        try:
+            busy = asyncio.ensure_future(executor.execute_gitbash("sleep 2", timeout=5))
+            await asyncio.sleep(0.2)
+            started = time.monotonic()
+            queued = await executor.execute_gitbash("echo ran", timeout=1)
+            waited = time.monotonic() - started
+            await busy
+        finally:
+            await executor.close()
+        return queued, waited
+
+    queued, waited = asyncio.run(run())
+
+    assert queued["error"] == "Command timed out after 1 seconds"
+    assert waited < 1.5
+
+
+def test_output_buffer_caps_and_decodes_split_characters():
+    output = server.OutputBuffer(cap=6)
+    data = "é€abcdef".encode("utf-8")
+    for byte in data:
+        output.feed(bytes([byte]))
+
+    # The cap counts bytes: 2 for é and 3 for € leave room for one more
+    assert output.getvalue() == "é€a" + server._truncation_note(len(data) - 6)
+
+
+def test_deadline_times_out_and_passes_results():
+    async def run():
+        assert await server._deadline(asyncio.sleep(0, result="done"), 1) == "done"
+        with pytest.raises(asyncio.TimeoutError):
+            await server._deadline(asyncio.sleep(5), 0.05)
+
+    asyncio.run(run())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a POSIX executable bit")
+def test_direct_argv_only_for_plain_programs(tmp_path):
+    program = tmp_path / "tool.exe"
+    program.write_text("")
+    program.chmod(0o755)
+
+    assert server._direct_argv("tool.exe --flag", str(tmp_path)) == [str(program), "--flag"]
+    assert server._direct_argv("tool.exe > out.txt", str(tmp_path)) is None
+    assert server._direct_argv("dir", str(tmp_path)) is None
+    assert server._direct_argv("missing.exe", str(tmp_path)) is None
+
+
+def test_handle_call_rejects_missing_command_and_unknown_tool():
+    assert asyncio.run(server.handle_call("execute_gitbash", {})) == server.to_json({
+        "success": False, "error": "Command parameter is required",
+    })
+    assert asyncio.run(server.handle_call("execute_fish", {"command": "ls"})) == server.to_json({
+        "success": False, "error": "Unknown tool: execute_fish",
+    })